@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import StageTimer
+
+# Name of the period column produced for each bucket size
+PERIOD_COLUMNS = {
+    'hour': 'hour_start',
+    'epoch': 'epoch',
+    'day': 'date',
+    'week': 'week_start',
+    'month': 'month_start',
+}
+
+def clean_numeric(values):
+    """Strip thousands separators and convert a column to numbers"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    return pd.to_numeric(values.astype(str).str.replace(',', ''), errors='coerce')
+
+def assign_periods(blocks, freq='day', time_col='DateTime (UTC)', epoch_col='Epoch'):
+    """
+    Map every block to the bucket it belongs to.
+
+    Time buckets are returned as the bucket start timestamp (weeks start on
+    Monday, matching `dt.to_period('W').dt.start_time`). Epoch buckets are the
+    beacon chain epoch number.
+    """
+    if freq not in PERIOD_COLUMNS:
+        raise ValueError(f"Unknown freq '{freq}', expected one of {list(PERIOD_COLUMNS)}")
+
+    if freq == 'epoch':
+        return clean_numeric(blocks[epoch_col])
+
+    times = pd.to_datetime(blocks[time_col]).to_numpy(dtype='datetime64[ns]')
+    if freq == 'hour':
+        periods = times.astype('datetime64[h]')
+    elif freq == 'day':
+        periods = times.astype('datetime64[D]')
+    elif freq == 'week':
+        days = times.astype('datetime64[D]')
+        # 1970-01-01 was a Thursday, so shift by 3 to get Monday = 0
+        weekday = (days.astype(np.int64) + 3) % 7
+        periods = days - weekday.astype('timedelta64[D]')
+    else:
+        periods = times.astype('datetime64[M]')
+
+    return pd.Series(periods.astype('datetime64[ns]'), index=blocks.index)
+
+def count_blocks_by_period(blocks, freq='day', recipient_col='Fee Recipient Nametag',
+                           time_col='DateTime (UTC)', epoch_col='Epoch'):
+    """
+    Count blocks per (period, recipient) in a single grouped pass.
+
+    Blocks without a recipient are kept as a row with a missing recipient so
+    that per-period totals still include them (the same denominator the
+    notebooks used with `len(day_blocks)`).
+
+    Categorical recipient columns (as loaded from the block store) and
+    integer codes (from recipients.recipient_codes, -1 for no recipient) are
+    counted with integer arithmetic only; for integer input the recipient
+    column of the result holds the codes (Int32, missing for no recipient).
+
+    Returns a long DataFrame with columns [period, recipient, 'blocks'].
+    """
+    period_col = PERIOD_COLUMNS[freq]
+    periods = assign_periods(blocks, freq, time_col=time_col, epoch_col=epoch_col)
+
+    values = blocks[recipient_col]
+    if pd.api.types.is_integer_dtype(values):
+        codes = values.to_numpy(dtype=np.int64, na_value=-1)
+        return count_codes_by_period(periods.to_numpy(), codes, period_col, recipient_col)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Dictionary-encoded column from the block store: count the codes, then label them
+        counts = count_codes_by_period(periods.to_numpy(), values.cat.codes.to_numpy(), period_col, recipient_col)
+        labels = np.r_[values.cat.categories.to_numpy(dtype=object), None]
+        counts[recipient_col] = labels[counts[recipient_col].to_numpy(dtype=np.int64, na_value=-1)]
+        return counts
+
+    grouped = pd.DataFrame({
+        period_col: periods.to_numpy(),
+        recipient_col: blocks[recipient_col].to_numpy(),
+    }).groupby([period_col, recipient_col], dropna=False, sort=False).size()
+
+    counts = grouped.rename('blocks').reset_index()
+    return counts.dropna(subset=[period_col]).reset_index(drop=True)
+
+def count_codes_by_period(periods, codes, period_col='date', recipient_col='Fee Recipient Nametag',
+                          dense_limit=50_000_000):
+    """
+    Count blocks per (period, recipient code) from integer codes (-1 = no
+    recipient), as one bincount over period * n_codes + code when the dense
+    table has at most `dense_limit` cells and one integer sort otherwise.
+    """
+    period_codes, period_index = pd.factorize(periods, sort=True)
+    valid = period_codes >= 0
+    codes = np.where(np.asarray(codes) >= 0, codes, -1).astype(np.int64)[valid]
+    n_codes = int(codes.max()) + 2 if len(codes) else 1
+
+    keys = period_codes[valid].astype(np.int64) * n_codes + codes + 1
+    if len(period_index) * n_codes <= dense_limit:
+        blocks = np.bincount(keys, minlength=len(period_index) * n_codes)
+        keys = np.flatnonzero(blocks)
+        blocks = blocks[keys]
+    else:
+        keys, blocks = np.unique(keys, return_counts=True)
+
+    recipients = pd.array(keys % n_codes - 1, dtype='Int32')
+    recipients[recipients < 0] = pd.NA
+    return pd.DataFrame({
+        period_col: np.asarray(period_index)[keys // n_codes],
+        recipient_col: recipients,
+        'blocks': blocks.astype(np.int64),
+    })
+
+def rank_share_matrix(counts, top_k=20, period_col='date', recipient_col='Fee Recipient Nametag'):
+    """
+    Turn long per-period counts into the ranked share layout used by the
+    notebooks: one row per period with `miner_rank_1..miner_rank_K` holding the
+    percentage of that period's blocks produced by the K largest recipients
+    (padded with 0 when fewer than K recipients were active).
+    """
+    periods, period_index = pd.factorize(counts[period_col], sort=True)
+    blocks = counts['blocks'].to_numpy(dtype=np.float64)
+
+    totals = np.bincount(periods, weights=blocks, minlength=len(period_index))
+
+    # Recipients without a name are part of the total but never ranked
+    named = counts[recipient_col].notna().to_numpy()
+    periods = periods[named]
+    blocks = blocks[named]
+
+    # Sort by period, then by block count descending, and rank within period
+    order = np.lexsort((-blocks, periods))
+    periods = periods[order]
+    blocks = blocks[order]
+    group_start = np.r_[0, np.flatnonzero(np.diff(periods)) + 1]
+    group_sizes = np.diff(np.r_[group_start, len(periods)])
+    ranks = np.arange(len(periods)) - np.repeat(group_start, group_sizes)
+
+    keep = ranks < top_k
+    shares = np.zeros((len(period_index), top_k))
+    shares[periods[keep], ranks[keep]] = blocks[keep] / totals[periods[keep]] * 100
+
+    columns = [f'miner_rank_{i+1}' for i in range(top_k)]
+    result = pd.DataFrame(shares, columns=columns)
+    result[period_col] = np.asarray(period_index)
+    return result
+
+def build_rank_share_matrix(blocks, freq='day', top_k=20, recipient_col='Fee Recipient Nametag',
+                            time_col='DateTime (UTC)', epoch_col='Epoch'):
+    """
+    Build the per-period ranked share matrix straight from block rows.
+
+    Replaces the per-day / per-week loops in ETH_daily_analysis.ipynb and
+    ETH_analysis.ipynb. Supported buckets: hour, epoch, day, week, month.
+    """
+    with StageTimer(f'aggregate_{freq}', rows=len(blocks)) as stage:
+        with stage.timed('count_seconds'):
+            counts = count_blocks_by_period(blocks, freq, recipient_col=recipient_col,
+                                            time_col=time_col, epoch_col=epoch_col)
+        with stage.timed('rank_seconds'):
+            result = rank_share_matrix(counts, top_k=top_k, period_col=PERIOD_COLUMNS[freq],
+                                       recipient_col=recipient_col)
+        stage.count('periods', len(result))
+    return result
+
+def add_centrality_metrics(miners_df, top_k=20):
+    """
+    Add the centrality columns used by the regressions (top-N sums, top10/top20
+    mean and std, hhi, gini) computed from the miner_rank_* share columns.
+    """
+    shares = miners_df[[f'miner_rank_{i+1}' for i in range(top_k)]].to_numpy(dtype=np.float64)
+
+    miners_df['top1_centrality'] = shares[:, 0]
+    miners_df['top10_mean'] = shares[:, :10].mean(axis=1)
+    miners_df['top10_std'] = shares[:, :10].std(axis=1, ddof=1)
+    miners_df['top20_mean'] = shares[:, :20].mean(axis=1)
+    miners_df['top20_std'] = shares[:, :20].std(axis=1, ddof=1)
+    miners_df['top3_centrality'] = shares[:, :3].sum(axis=1)
+    miners_df['top5_centrality'] = shares[:, :5].sum(axis=1)
+    miners_df['top10_centrality'] = shares[:, :10].sum(axis=1)
+
+    # HHI on the standard 0-10000 scale
+    miners_df['hhi'] = ((shares / 100) ** 2).sum(axis=1) * 10000
+
+    # Gini over the non-zero shares of each row
+    ascending = np.sort(shares, axis=1)
+    n = (ascending > 0).sum(axis=1)
+    index = np.arange(1, top_k + 1) - (top_k - n)[:, None]
+    weighted = np.where(ascending > 0, index * ascending, 0).sum(axis=1)
+    total = ascending.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gini = 2 * weighted / (n * total) - (n + 1) / n
+    miners_df['gini'] = np.where(n > 0, gini, 0.0)
+
+    return miners_df
@@ -0,0 +1,276 @@
+import os
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from preprocess import preprocess_eth_blocks_csv, preprocess_eth_blocks_csv_streaming
+from block_store import load_blocks
+from gaps import find_block_gaps
+from aggregation import count_blocks_by_period, rank_share_matrix, add_centrality_metrics
+from metrics import period_metrics
+from instrumentation import StageTimer
+
+# First post-merge block and its timestamp; blocks are generated 12 s apart
+GENESIS_BLOCK = 15_537_394
+GENESIS_TIME = np.datetime64('2022-09-15 06:42:59', 's')
+SLOT_OFFSET = 4_700_000
+RAW_COLUMNS = [
+    'Block', 'Slot', 'Epoch', 'DateTime (UTC)', 'BlobCount', 'Txn', 'Fee Recipient',
+    'Fee Recipient Nametag', 'Gas Used', 'Gas Used(%)', ' % Of Gas Target', 'Gas Limit',
+    'Base Fee', 'Reward', 'Burnt Fees (ETH)', 'Burnt Fees (%)'
+]
+SCALES = {'1M': 1_000_000, '10M': 10_000_000, '50M': 50_000_000}
+
+def parse_scale(label):
+    """'1M' / '250k' / '1000' -> number of blocks"""
+    label = label.strip()
+    if label in SCALES:
+        return SCALES[label]
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(label[-1].lower(), 1)
+    return int(float(label.rstrip('kKmM')) * multiplier)
+
+def _with_commas(values):
+    return [f"{x:,}" for x in values.tolist()]
+
+def _addresses(rng, n):
+    return np.array(['0x' + bytes(row).hex() for row in rng.integers(0, 256, (n, 20), dtype=np.uint8)],
+                    dtype=object)
+
+def generate_blocks_csv(path, n_blocks, seed=0, n_entities=200, zipf_a=1.1, unlabeled_share=0.15,
+                        duplicate_rate=0.002, gap_rate=0.0005, mean_gap=5, chunk_rows=1_000_000):
+    """
+    Write a synthetic raw block CSV in the Etherscan export schema
+    (ETH_Block_Data_Cleaned.csv), deterministic for a given `seed`:
+    - Block / Slot / Epoch / Gas Used with thousands separators
+    - Fee Recipient Nametag drawn from a Zipf(`zipf_a`) distribution over
+      `n_entities` builders, `unlabeled_share` of blocks without a nametag
+    - every entity pays to 1-3 fee recipient addresses
+    - runs of missing blocks (starting with probability `gap_rate`, mean
+      length `mean_gap`) and `duplicate_rate` re-exported rows
+
+    Rows are written in chunks of `chunk_rows`, so memory stays flat at any
+    scale. Returns the number of rows written (duplicates included).
+    """
+    rng = np.random.default_rng(seed)
+
+    ranks = np.arange(1, n_entities + 1)
+    weights = 1.0 / ranks ** zipf_a
+    weights = np.r_[weights / weights.sum() * (1 - unlabeled_share), unlabeled_share]
+    names = np.array([f'Builder {rank:04d}' for rank in ranks] + [''], dtype=object)
+
+    addresses_per_entity = rng.integers(1, 4, n_entities)
+    entity_addresses = _addresses(rng, int(addresses_per_entity.sum()))
+    first_address = np.r_[0, np.cumsum(addresses_per_entity)[:-1]]
+    solo_addresses = _addresses(rng, 5000)
+
+    rows_written = 0
+    next_block = GENESIS_BLOCK
+    generated = 0
+    with open(path, 'w', newline='') as file:
+        file.write(','.join(f'"{col}"' if ',' in col else col for col in RAW_COLUMNS) + '\n')
+
+        while generated < n_blocks:
+            n = min(chunk_rows, n_blocks - generated)
+            blocks = next_block + np.arange(n, dtype=np.int64)
+            next_block += n
+            generated += n
+
+            # Runs of missing blocks
+            starts = np.flatnonzero(rng.random(n) < gap_rate)
+            ends = np.minimum(starts + rng.geometric(1 / mean_gap, len(starts)), n)
+            edges = np.zeros(n + 1, dtype=np.int64)
+            np.add.at(edges, starts, 1)
+            np.add.at(edges, ends, -1)
+            blocks = blocks[np.cumsum(edges[:-1]) == 0]
+
+            # Re-exported rows appear again later in the file
+            duplicates = rng.choice(blocks, int(len(blocks) * duplicate_rate), replace=False)
+            blocks = np.r_[blocks, np.sort(duplicates)]
+            m = len(blocks)
+
+            entity = rng.choice(n_entities + 1, m, p=weights)
+            labeled = entity < n_entities
+            recipient = np.empty(m, dtype=object)
+            offset = rng.integers(0, 3, m) % addresses_per_entity[np.minimum(entity, n_entities - 1)]
+            recipient[labeled] = entity_addresses[first_address[entity[labeled]] + offset[labeled]]
+            recipient[~labeled] = solo_addresses[rng.integers(0, len(solo_addresses), (~labeled).sum())]
+
+            slots = blocks + SLOT_OFFSET
+            times = GENESIS_TIME + ((blocks - GENESIS_BLOCK) * 12).astype('timedelta64[s]')
+            gas_used = rng.integers(5_000_000, 30_000_000, m)
+            base_fee = rng.gamma(2.0, 10.0, m)
+
+            chunk = pd.DataFrame({
+                'Block': _with_commas(blocks),
+                'Slot': _with_commas(slots),
+                'Epoch': _with_commas(slots // 32),
+                'DateTime (UTC)': np.datetime_as_string(times).astype(object),
+                'BlobCount': rng.integers(0, 7, m),
+                'Txn': rng.integers(0, 400, m),
+                'Fee Recipient': recipient,
+                'Fee Recipient Nametag': names[entity],
+                'Gas Used': _with_commas(gas_used),
+                'Gas Used(%)': [f'{x:.2f}%' for x in (gas_used / 300_000).tolist()],
+                ' % Of Gas Target': [f'{x:+.2f}%' for x in (gas_used / 150_000 - 100).tolist()],
+                'Gas Limit': '30,000,000',
+                'Base Fee': [f'{x:.4f} Gwei' for x in base_fee.tolist()],
+                'Reward': [f'{x:.5f} ETH' for x in rng.exponential(0.05, m).tolist()],
+                'Burnt Fees (ETH)': np.round(base_fee * gas_used / 1e9, 6),
+                'Burnt Fees (%)': [f'{x:.2f}%' for x in rng.uniform(20, 90, m).tolist()],
+            })
+            chunk['DateTime (UTC)'] = chunk['DateTime (UTC)'].str.replace('T', ' ')
+            chunk.to_csv(file, header=False, index=False)
+            rows_written += m
+
+    return rows_written
+
+def run_upload_stage(processed_csv, upload_records, max_workers=8):
+    """Upload the first `upload_records` rows to an in-process DynamoDB (moto)"""
+    from moto import mock_aws
+    import boto3
+    from bulk_upload import batch_upload_to_dynamodb, create_table
+
+    with mock_aws():
+        client = boto3.client('dynamodb', aws_access_key_id='testing', aws_secret_access_key='testing',
+                              region_name='us-west-1')
+        create_table(client)
+        with StageTimer('benchmark.upload', rows=upload_records, quiet=True) as timer:
+            uploaded, failed = batch_upload_to_dynamodb(processed_csv, max_records=upload_records,
+                                                        max_workers=max_workers, client=client)
+    batches = (upload_records + 24) // 25
+    timer.extra.update({
+        'uploaded': uploaded,
+        'failed': len(failed),
+        'seconds_per_batch': round(timer.seconds / batches, 5) if batches else None,
+    })
+    return timer.result()
+
+def run_benchmark(n_blocks, work_dir, seed=0, stream=None, in_memory_limit=10_000_000,
+                  upload_records=20_000, verbose=False):
+    """
+    Generate `n_blocks` synthetic blocks and time every pipeline stage:
+    1. preprocess (in-memory up to `in_memory_limit` rows, streaming above,
+       or as forced by `stream`), writing the processed CSV and block store
+    2. load the key columns back from the block store
+    3. missing-block detection
+    4. daily aggregation (rank share matrix + centrality columns)
+    5. metric computation over hourly counts
+    6. upload of `upload_records` rows against moto (skipped if 0 or moto is missing)
+
+    Returns a list of per-stage result dicts.
+    """
+    raw_csv = os.path.join(work_dir, 'ETH_Block_Data_Cleaned.csv')
+    processed_csv = os.path.join(work_dir, 'ETH_Block_Data_Processed.csv')
+    store_dir = os.path.join(work_dir, 'ETH_Block_Store')
+    stages = []
+
+    with StageTimer('benchmark.generate', quiet=True) as timer:
+        rows = timer.rows = generate_blocks_csv(raw_csv, n_blocks, seed=seed)
+    timer.extra['csv_mb'] = round(os.path.getsize(raw_csv) / 2**20, 1)
+    stages.append(timer.result())
+    print(f"✅ Generated {rows:,} rows ({timer.extra['csv_mb']:,} MB) in {timer.seconds:.1f}s")
+
+    stream = rows > in_memory_limit if stream is None else stream
+    preprocess = preprocess_eth_blocks_csv_streaming if stream else preprocess_eth_blocks_csv
+    with StageTimer('benchmark.preprocess', rows=rows, quiet=not verbose) as timer:
+        success = preprocess(raw_csv, processed_csv, store_dir=store_dir)
+    timer.extra['mode'] = 'streaming' if stream else 'in_memory'
+    stages.append(timer.result())
+    if not success:
+        print("❌ Preprocessing failed, stopping")
+        return stages
+    print(f"✅ preprocess ({timer.extra['mode']}): {timer.seconds:.1f}s")
+
+    columns = ['Block', 'DateTime (UTC)', 'Fee Recipient Nametag']
+    with StageTimer('benchmark.load_store', rows=rows, quiet=True) as timer:
+        blocks = load_blocks(store_dir, columns=columns)
+        timer.rows = len(blocks)
+    stages.append(timer.result())
+
+    with StageTimer('benchmark.gaps', rows=len(blocks), quiet=True) as timer:
+        gaps = find_block_gaps(blocks['Block'].to_numpy(dtype=np.int64))
+    timer.extra['gaps'] = len(gaps)
+    timer.extra['missing_blocks'] = int(gaps['length'].sum())
+    stages.append(timer.result())
+
+    with StageTimer('benchmark.daily_aggregation', rows=len(blocks), quiet=True) as timer:
+        daily_counts = count_blocks_by_period(blocks, 'day')
+        daily = add_centrality_metrics(rank_share_matrix(daily_counts, period_col='date'))
+    timer.extra['periods'] = len(daily)
+    stages.append(timer.result())
+
+    hourly_counts = count_blocks_by_period(blocks, 'hour')
+    with StageTimer('benchmark.metrics', rows=len(hourly_counts), quiet=True) as timer:
+        hourly = period_metrics(hourly_counts, period_col='hour_start')
+    timer.extra['periods'] = len(hourly)
+    stages.append(timer.result())
+    del blocks, hourly_counts
+
+    for stage in stages[2:]:
+        print(f"✅ {stage['stage']}: {stage['seconds']:.2f}s, peak RSS {stage['peak_rss_mb']:,} MB")
+
+    if upload_records:
+        try:
+            stages.append(run_upload_stage(processed_csv, min(upload_records, rows)))
+            print(f"✅ upload: {stages[-1]['rows_per_second']:,} records/s "
+                  f"({stages[-1]['seconds_per_batch']}s per batch)")
+        except ImportError:
+            print("⚠️  moto not installed, skipping the upload stage")
+
+    return stages
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ingest-to-metrics pipeline on synthetic blocks")
+    parser.add_argument('--scales', nargs='+', default=['1M'], help="e.g. 1M 10M 50M (or 250k, 5000)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stream', action='store_true', help="always use the streaming preprocessor")
+    parser.add_argument('--upload-records', type=int, default=20_000, help="0 skips the upload stage")
+    parser.add_argument('--work-dir', default=None, help="where to write the generated data (default: temp dir)")
+    parser.add_argument('--output-dir', default='../results/benchmarks')
+    parser.add_argument('--keep-data', action='store_true')
+    parser.add_argument('--verbose', action='store_true', help="show the stages' own output")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    print("=== Pipeline Benchmark ===")
+
+    for label in args.scales:
+        n_blocks = parse_scale(label)
+        work_dir = tempfile.mkdtemp(prefix=f'eth_bench_{label}_', dir=args.work_dir)
+        print(f"\n--- {label}: {n_blocks:,} blocks (work dir {work_dir}) ---")
+
+        try:
+            stages = run_benchmark(n_blocks, work_dir, seed=args.seed, stream=args.stream or None,
+                                   upload_records=args.upload_records, verbose=args.verbose)
+        finally:
+            if not args.keep_data:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        report = {
+            'scale': label,
+            'n_blocks': n_blocks,
+            'seed': args.seed,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'stages': stages,
+        }
+        output_file = os.path.join(args.output_dir, f'benchmark_{label}.json')
+        with open(output_file, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"✅ Results saved: {output_file}")
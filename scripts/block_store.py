@@ -0,0 +1,104 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from aggregation import clean_numeric
+
+# Columns stored as integers / floats instead of comma-formatted strings
+INT_COLUMNS = ['Block', 'Slot', 'Epoch', 'Txn', 'Gas Used', 'Gas Limit']
+FLOAT_COLUMNS = ['Burnt Fees (ETH)']
+
+# Low-cardinality string columns stored dictionary-encoded (loaded back as categoricals)
+DICTIONARY_COLUMNS = ['Fee Recipient', 'Fee Recipient Nametag']
+
+# Hive-style partition column (e.g. month=2023-04)
+PARTITION_COLUMN = 'month'
+
+def to_typed_blocks(df):
+    """Convert processed block rows to typed columns ready for the store"""
+    typed = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        if col in INT_COLUMNS:
+            typed[col] = clean_numeric(df[col]).astype('Int64')
+        elif col in FLOAT_COLUMNS:
+            typed[col] = clean_numeric(df[col]).astype('float64')
+        elif col in ('Date', 'DateTime (UTC)'):
+            typed[col] = pd.to_datetime(df[col])
+        else:
+            typed[col] = df[col].astype('string')
+
+    if 'Date' not in typed.columns:
+        typed['Date'] = typed['DateTime (UTC)'].dt.normalize()
+    typed[PARTITION_COLUMN] = typed['Date'].dt.strftime('%Y-%m')
+    return typed
+
+def write_block_store(df, store_dir, chunk_id=None):
+    """
+    Write block rows to a month-partitioned Parquet store.
+
+    Rows are sorted by Block so row-group statistics on Date and Block stay
+    tight and date predicates can skip most of each file. Every month present
+    in `df` is replaced as a whole, so pass complete months; other partitions
+    are left untouched.
+
+    When `chunk_id` is given the rows are appended as new files instead, which
+    lets a streaming writer add one chunk at a time to a fresh store.
+    """
+    typed = to_typed_blocks(df).sort_values('Block')
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+    table = table.set_column(
+        table.schema.get_field_index('Date'), 'Date', table.column('Date').cast(pa.date32())
+    )
+    for col in DICTIONARY_COLUMNS:
+        if col in table.column_names:
+            table = table.set_column(table.schema.get_field_index(col), col, pc.dictionary_encode(table.column(col)))
+
+    ds.write_dataset(
+        table,
+        store_dir,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive'),
+        existing_data_behavior='delete_matching' if chunk_id is None else 'overwrite_or_ignore',
+        basename_template='blocks-{i}.parquet' if chunk_id is None else f'blocks-{chunk_id:05d}-{{i}}.parquet',
+    )
+    return len(typed)
+
+def date_filter(start_date=None, end_date=None):
+    """Build a dataset predicate for an inclusive Date range"""
+    predicate = None
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        predicate = (ds.field(PARTITION_COLUMN) >= start.strftime('%Y-%m')) & \
+                    (ds.field('Date') >= pa.scalar(start.date(), pa.date32()))
+    if end_date is not None:
+        end = pd.Timestamp(end_date)
+        end_predicate = (ds.field(PARTITION_COLUMN) <= end.strftime('%Y-%m')) & \
+                        (ds.field('Date') <= pa.scalar(end.date(), pa.date32()))
+        predicate = end_predicate if predicate is None else predicate & end_predicate
+    return predicate
+
+def open_block_store(store_dir):
+    """Open the Parquet store as a pyarrow dataset"""
+    if not os.path.isdir(store_dir):
+        raise FileNotFoundError(f"Block store not found: {store_dir}")
+    return ds.dataset(store_dir, format='parquet', partitioning='hive')
+
+def load_blocks(store_dir, columns=None, start_date=None, end_date=None):
+    """
+    Load blocks from the store.
+
+    Only the requested `columns` are read, and only partitions / row groups
+    overlapping [start_date, end_date] are scanned. Date comes back as a
+    datetime64 column.
+    """
+    dataset = open_block_store(store_dir)
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != PARTITION_COLUMN]
+
+    table = dataset.to_table(columns=list(columns), filter=date_filter(start_date, end_date))
+    df = table.to_pandas(date_as_object=False)
+    if 'Block' in df.columns:
+        df = df.sort_values('Block').reset_index(drop=True)
+    return df
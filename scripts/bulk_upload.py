@@ -1,10 +1,17 @@
 import boto3
 import os
 import csv
+import sys
+import json
 import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dotenv import load_dotenv
 from datetime import datetime
 
+from instrumentation import StageTimer, configure_from_argv
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -15,9 +22,54 @@ dynamodb = boto3.client(
     'dynamodb',
     aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
     aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-    region_name='us-west-1'
+    region_name='us-west-1',
+    endpoint_url=os.getenv('DYNAMODB_ENDPOINT_URL')  # e.g. http://localhost:8000 for DynamoDB Local
 )
 
+class RateLimiter:
+    """Thread-safe token bucket limiting writes to `rate` items per second"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, n=1):
+        """Block until `n` tokens are available"""
+        n = min(n, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait_time = (n - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+    def charge(self, n):
+        """
+        Pay for `n` tokens already spent (e.g. the read units a page
+        consumed). The full amount is charged even above the bucket
+        capacity, so the bucket can go into debt, and the caller sleeps until
+        the debt is paid off.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            wait_time = -self.tokens / self.rate
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+def backoff_delay(attempt, base=0.05, cap=5.0):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
 def convert_csv_row_to_dynamodb_item(row):
     """Convert a CSV row to DynamoDB item format"""
     
@@ -67,127 +119,323 @@ def convert_csv_row_to_dynamodb_item(row):
     
     return item
 
-def batch_upload_to_dynamodb(csv_file_path, batch_size=25, max_records=None):
+def load_checkpoint(checkpoint_file, csv_file_path):
+    """Load the upload checkpoint for `csv_file_path`, or None if there isn't one"""
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file, 'r') as file:
+        checkpoint = json.load(file)
+    if checkpoint.get('csv_file') != os.path.abspath(csv_file_path):
+        print(f"⚠️  Checkpoint {checkpoint_file} is for a different file, ignoring it")
+        return None
+    return checkpoint
+
+def save_checkpoint(checkpoint_file, checkpoint):
+    """Atomically write the checkpoint (write to a temp file, then rename)"""
+    checkpoint['updated'] = datetime.now().isoformat(timespec='seconds')
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'w') as file:
+        json.dump(checkpoint, file, indent=2)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_file, checkpoint_file)
+
+class _OffsetLines:
+    """Decoded lines of a binary file for csv.reader, with the byte offset just after the last line read"""
+
+    def __init__(self, file):
+        self.file = file
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file.readline()
+        if not line:
+            raise StopIteration
+        return line.decode('utf-8')
+
+    @property
+    def offset(self):
+        return self.file.tell()
+
+def read_batches(csv_file_path, batch_size=25, max_records=None, start_offset=0):
+    """
+    Yield (batch_items, end_offset, last_key) from the CSV, where batch_items
+    is a list of at most `batch_size` PutRequests, end_offset is the byte
+    offset just after the batch's last row and last_key its (Date, Block).
+
+    Reading starts at byte `start_offset` (0 = first data row), so a resumed
+    upload seeks straight past everything already committed. csv.reader
+    pulls lines only until a record is complete, so the offset after a row
+    stays exact for quoted fields spanning several lines.
+    """
+    with open(csv_file_path, 'rb') as file:
+        lines = _OffsetLines(file)
+        reader = csv.reader(lines)
+        header = next(reader)
+        if start_offset:
+            file.seek(start_offset)
+
+        batch_items = []
+        last_key = None
+        i = 0
+
+        for values in reader:
+            if not values:
+                continue
+            row = dict(zip(header, values))
+
+            # Convert row to DynamoDB format
+            dynamodb_item = convert_csv_row_to_dynamodb_item(row)
+
+            if dynamodb_item:
+                batch_items.append({
+                    'PutRequest': {
+                        'Item': dynamodb_item
+                    }
+                })
+                last_key = [row['Date'], row['Block']]
+
+            # When batch is full
+            if len(batch_items) >= batch_size:
+                yield batch_items, lines.offset, last_key
+                batch_items = []
+
+            # Optional: limit for testing
+            i += 1
+            if max_records and i >= max_records:
+                print(f"Reached max_records limit: {max_records}")
+                break
+
+        # Remaining items in the last batch
+        if batch_items:
+            yield batch_items, lines.offset, last_key
+
+def batch_upload_to_dynamodb(csv_file_path, batch_size=25, max_records=None, max_workers=8,
+                             max_items_per_second=None, client=None, checkpoint_file=None):
     """
     Upload CSV data to DynamoDB using batch operations
     DynamoDB batch_write_item supports max 25 items per batch
+
+    Batches are written by a pool of `max_workers` threads, optionally capped
+    at `max_items_per_second` write requests. Only items DynamoDB actually
+    accepted are counted as uploaded; items still unprocessed after retries
+    are returned in `failed_items`.
+
+    With `checkpoint_file`, the byte offset and (Date, Block) key of the last
+    fully committed batch are saved as batches complete, and a rerun resumes
+    from that offset. Puts are idempotent, so batches that finished after the
+    checkpoint are simply rewritten.
     """
-    
+
+    client = client or dynamodb
+    rate_limiter = RateLimiter(max_items_per_second) if max_items_per_second else None
+    file_size = os.path.getsize(csv_file_path) if os.path.exists(csv_file_path) else 0
+
+    checkpoint = load_checkpoint(checkpoint_file, csv_file_path) or {
+        'csv_file': os.path.abspath(csv_file_path),
+        'offset': 0,
+        'last_key': None,
+        'records_committed': 0,
+    }
+    start_offset = checkpoint['offset']
+    if checkpoint['offset']:
+        print(f"Resuming from checkpoint: byte {checkpoint['offset']:,} of {file_size:,}, "
+              f"last committed key {checkpoint['last_key']}, "
+              f"{checkpoint['records_committed']:,} records already committed")
+
     total_uploaded = 0
     batch_count = 0
     failed_items = []
-    
+
+    # Batches finish out of order; the checkpoint only advances over the
+    # contiguous prefix of batches that were written without failures
+    finished = {}
+    next_to_commit = 0
+    commit_blocked = False
+    last_saved = time.monotonic()
+
+    def commit(force=False):
+        nonlocal next_to_commit, commit_blocked, last_saved
+        while not commit_blocked and next_to_commit in finished:
+            batch_size_done, batch_failed, end_offset, last_key = finished.pop(next_to_commit)
+            if batch_failed:
+                commit_blocked = True
+                break
+            checkpoint['offset'] = end_offset
+            checkpoint['last_key'] = last_key
+            checkpoint['records_committed'] += batch_size_done
+            next_to_commit += 1
+
+        if checkpoint_file and (force or time.monotonic() - last_saved >= 1.0):
+            save_checkpoint(checkpoint_file, checkpoint)
+            last_saved = time.monotonic()
+
+    def collect(done):
+        nonlocal total_uploaded, batch_count
+        for future in done:
+            batch_number, batch_items, batch_failed, end_offset, last_key = future.result()
+            total_uploaded += len(batch_items) - len(batch_failed)
+            failed_items.extend(batch_failed)
+            batch_count += 1
+            finished[batch_number] = (len(batch_items), batch_failed, end_offset, last_key)
+
+            # Progress update every 10 batches (250 records)
+            if batch_count % 10 == 0:
+                percent = 100 * checkpoint['offset'] / file_size if file_size else 0
+                print(f"Progress: {total_uploaded:,} records uploaded ({batch_count} batches), "
+                      f"{percent:.1f}% of file committed")
+        commit()
+
+    def upload(batch_number, batch_items, end_offset, last_key):
+        with stage.timed('batch_seconds'):
+            batch_failed = upload_batch(batch_items, batch_number, client, rate_limiter, stage=stage)
+        return batch_number, batch_items, batch_failed, end_offset, last_key
+
     try:
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            batch_items = []
-            
-            print(f"Starting batch upload to DynamoDB table: {table_name}")
-            print(f"Batch size: {batch_size} items per batch")
-            
-            for i, row in enumerate(csv_reader):
-                
-                # Convert row to DynamoDB format
-                dynamodb_item = convert_csv_row_to_dynamodb_item(row)
-                
-                if dynamodb_item:
-                    batch_items.append({
-                        'PutRequest': {
-                            'Item': dynamodb_item
-                        }
-                    })
-                
-                # When batch is full or we've reached the end
-                if len(batch_items) >= batch_size:
-                    success = upload_batch(batch_items, batch_count)
-                    if success:
-                        total_uploaded += len(batch_items)
-                        batch_count += 1
-                        
-                        # Progress update every 10 batches (250 records)
-                        if batch_count % 10 == 0:
-                            print(f"Progress: {total_uploaded:,} records uploaded ({batch_count} batches)")
-                    else:
-                        failed_items.extend(batch_items)
-                    
-                    batch_items = []  # Reset batch
-                
-                # Optional: limit for testing
-                if max_records and i >= max_records - 1:
-                    print(f"Reached max_records limit: {max_records}")
-                    break
-            
-            # Upload remaining items in the last batch
-            if batch_items:
-                success = upload_batch(batch_items, batch_count)
-                if success:
-                    total_uploaded += len(batch_items)
-                    batch_count += 1
-                else:
-                    failed_items.extend(batch_items)
-        
+        print(f"Starting batch upload to DynamoDB table: {table_name}")
+        print(f"Batch size: {batch_size} items per batch, {max_workers} workers")
+
+        with StageTimer('upload') as stage, ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            batches = read_batches(csv_file_path, batch_size, max_records, checkpoint['offset'])
+
+            for batch_number, (batch_items, end_offset, last_key) in enumerate(batches):
+                pending.add(executor.submit(upload, batch_number, batch_items, end_offset, last_key))
+
+                # Keep a bounded number of batches in flight
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            done, _ = wait(pending)
+            collect(done)
+
+            stage.rows = total_uploaded
+            stage.bytes = checkpoint['offset'] - start_offset
+            stage.count('batches', batch_count)
+            stage.count('failed_items', len(failed_items))
+
         print(f"\n=== Upload Complete ===")
         print(f"Total records uploaded: {total_uploaded:,}")
         print(f"Total batches: {batch_count}")
         print(f"Failed items: {len(failed_items)}")
-        
+        latency = stage.result().get('latency', {}).get('batch_seconds')
+        if latency:
+            print(f"Batch latency: p50 {latency['p50'] * 1000:.0f} ms, p99 {latency['p99'] * 1000:.0f} ms")
+        if checkpoint_file:
+            print(f"Records committed (all runs): {checkpoint['records_committed']:,}")
+
         if failed_items:
             print(f"⚠️  Some items failed to upload. Consider retrying failed items.")
-            
+
         return total_uploaded, failed_items
-        
+
     except FileNotFoundError:
         print(f"❌ File not found: {csv_file_path}")
         return 0, []
     except Exception as e:
         print(f"❌ Error during upload: {str(e)}")
         return total_uploaded, failed_items
+    finally:
+        # Also runs on Ctrl-C, so the next run picks up where this one stopped
+        if checkpoint_file and os.path.exists(csv_file_path):
+            commit(force=True)
+
+def upload_batch(batch_items, batch_number, client=None, rate_limiter=None, max_retries=8, stage=None):
+    """
+    Upload a single batch to DynamoDB with retry logic
+
+    UnprocessedItems are re-submitted with jittered exponential backoff until
+    they are written or `max_retries` attempts are used. Returns the list of
+    items that could not be written (empty on full success). Retries are
+    counted on `stage` (an instrumentation.StageTimer) when given.
+    """
+
+    client = client or dynamodb
+    remaining = batch_items
 
-def upload_batch(batch_items, batch_number):
-    """Upload a single batch to DynamoDB with retry logic"""
-    
-    max_retries = 3
-    retry_delay = 1  # seconds
-    
     for attempt in range(max_retries):
+        if rate_limiter:
+            rate_limiter.acquire(len(remaining))
+
         try:
-            response = dynamodb.batch_write_item(
+            response = client.batch_write_item(
                 RequestItems={
-                    table_name: batch_items
+                    table_name: remaining
                 }
             )
-            
-            # Check for unprocessed items
-            unprocessed = response.get('UnprocessedItems', {})
-            if unprocessed:
-                print(f"⚠️  Batch {batch_number}: {len(unprocessed.get(table_name, []))} unprocessed items")
-                # Could implement retry logic for unprocessed items here
-            
-            return True
-            
         except Exception as e:
+            if stage:
+                stage.count('request_errors')
             if attempt < max_retries - 1:
-                print(f"⚠️  Batch {batch_number} failed (attempt {attempt + 1}), retrying in {retry_delay}s: {str(e)}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                print(f"❌ Batch {batch_number} failed after {max_retries} attempts: {str(e)}")
-                return False
-    
-    return False
+                delay = backoff_delay(attempt)
+                print(f"⚠️  Batch {batch_number} failed (attempt {attempt + 1}), retrying in {delay:.2f}s: {str(e)}")
+                time.sleep(delay)
+                continue
+            print(f"❌ Batch {batch_number} failed after {max_retries} attempts: {str(e)}")
+            return remaining
+
+        # Re-submit only the unprocessed items
+        remaining = response.get('UnprocessedItems', {}).get(table_name, [])
+        if not remaining:
+            return []
+        if stage:
+            stage.count('unprocessed_items', len(remaining))
+
+        if attempt < max_retries - 1:
+            time.sleep(backoff_delay(attempt))
+
+    print(f"❌ Batch {batch_number}: {len(remaining)} items still unprocessed after {max_retries} attempts")
+    return remaining
 
-def estimate_upload_time(csv_file_path, batch_size=25):
-    """Estimate upload time based on file size"""
+def create_table(client=None):
+    """Create the ETH_Blocks table (Date partition key, Block sort key) if it doesn't exist"""
+    client = client or dynamodb
+    if table_name in client.list_tables()['TableNames']:
+        return
+    client.create_table(
+        TableName=table_name,
+        KeySchema=[
+            {'AttributeName': 'Date', 'KeyType': 'HASH'},
+            {'AttributeName': 'Block', 'KeyType': 'RANGE'},
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'Date', 'AttributeType': 'S'},
+            {'AttributeName': 'Block', 'AttributeType': 'N'},
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    client.get_waiter('table_exists').wait(TableName=table_name)
+
+def estimate_upload_time(csv_file_path, batch_size=25, start_offset=0, sample_rows=1000,
+                         seconds_per_batch=0.1):
+    """
+    Estimate upload time from the file size and the average row length of
+    the first `sample_rows` rows, without scanning the whole file.
+    Only the bytes after `start_offset` (e.g. a checkpoint) are counted.
+    `seconds_per_batch` defaults to a conservative 0.1 s; benchmark.py
+    reports the measured value.
+    """
     try:
-        with open(csv_file_path, 'r') as file:
-            row_count = sum(1 for line in file) - 1  # Subtract header
+        file_size = os.path.getsize(csv_file_path)
+        with open(csv_file_path, 'rb') as file:
+            header_bytes = len(file.readline())
+            sample = [len(line) for _, line in zip(range(sample_rows), file)]
+
+        if not sample:
+            row_count = 0
+        else:
+            bytes_per_row = sum(sample) / len(sample)
+            remaining_bytes = file_size - max(start_offset, header_bytes)
+            row_count = int(round(remaining_bytes / bytes_per_row))
         
         batches_needed = (row_count + batch_size - 1) // batch_size
-        # Estimate ~0.1 seconds per batch (conservative)
-        estimated_minutes = (batches_needed * 0.1) / 60
+        estimated_minutes = (batches_needed * seconds_per_batch) / 60
         
         print(f"=== Upload Estimation ===")
-        print(f"Total records: {row_count:,}")
+        print(f"Records remaining (estimated): {row_count:,}")
         print(f"Batches needed: {batches_needed:,}")
         print(f"Estimated time: {estimated_minutes:.1f} minutes")
         
@@ -199,6 +447,7 @@ def estimate_upload_time(csv_file_path, batch_size=25):
 
 if __name__ == "__main__":
     csv_file_path = "../data/raw/ETH_Block_Data_Processed.csv"
+    checkpoint_file = csv_file_path + ".upload_checkpoint.json"
     
     # Check if processed file exists
     if not os.path.exists(csv_file_path):
@@ -208,14 +457,23 @@ if __name__ == "__main__":
     
     print("=== DynamoDB Bulk Upload ===")
     
-    # Estimate upload time
-    row_count, batches, est_time = estimate_upload_time(csv_file_path)
+    # --events FILE / --profile DIR record stage timings and cProfile dumps
+    configure_from_argv()
+    
+    # --local writes to an in-process DynamoDB stand-in (moto) to measure throughput
+    local = "--local" in sys.argv
+    
+    # Estimate remaining work from the checkpoint (no extra pass over the file)
+    checkpoint = None if local else load_checkpoint(checkpoint_file, csv_file_path)
+    start_offset = checkpoint['offset'] if checkpoint else 0
+    row_count, batches, est_time = estimate_upload_time(csv_file_path, start_offset=start_offset)
     
     if row_count == 0:
-        exit(1)
+        print("Nothing left to upload.")
+        exit(0 if checkpoint else 1)
     
     # Ask for confirmation for large uploads
-    if row_count > 10000:
+    if row_count > 10000 and not local:
         response = input(f"\nReady to upload {row_count:,} records? This will take ~{est_time:.1f} minutes. Continue? (y/N): ")
         if response.lower() != 'y':
             print("Upload cancelled.")
@@ -226,9 +484,24 @@ if __name__ == "__main__":
     max_records = None  # Upload all records
     
     # Start upload
-    start_time = time.time()
-    uploaded, failed = batch_upload_to_dynamodb(csv_file_path, max_records=max_records)
-    end_time = time.time()
+    if local:
+        from moto import mock_aws
+        with mock_aws():
+            local_client = boto3.client(
+                'dynamodb',
+                aws_access_key_id='testing',
+                aws_secret_access_key='testing',
+                region_name='us-west-1'
+            )
+            create_table(local_client)
+            start_time = time.time()
+            uploaded, failed = batch_upload_to_dynamodb(csv_file_path, max_records=max_records, client=local_client)
+            end_time = time.time()
+    else:
+        start_time = time.time()
+        uploaded, failed = batch_upload_to_dynamodb(csv_file_path, max_records=max_records,
+                                                    checkpoint_file=checkpoint_file)
+        end_time = time.time()
     
     duration = end_time - start_time
     print(f"\n🎉 Upload completed in {duration/60:.1f} minutes")
@@ -0,0 +1,180 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from aggregation import count_blocks_by_period, rank_share_matrix, add_centrality_metrics
+from block_store import load_blocks
+from gaps import find_block_gaps, save_gap_index, load_gap_index
+from instrumentation import StageTimer, configure_from_argv
+
+RECIPIENT_COL = 'Fee Recipient Nametag'
+BLOCK_COLUMNS = ['Block', 'DateTime (UTC)', RECIPIENT_COL]
+
+# Same variables create_lagged_variables lags in ETH_daily_analysis.ipynb
+LAG_VARS = [
+    'prof_garman_klass_vol',
+    'yf_garman_klass_vol',
+    'eth_intraday_vol',
+    'eth_return',
+    'market_return',
+    'market_volatility',
+    'eth_turnover',
+    'market_turnover',
+    'top1_centrality',
+    'top3_centrality',
+    'top5_centrality',
+    'top10_centrality',
+    'hhi',
+    'gini'
+]
+
+def load_state(state_dir):
+    """
+    Load the persisted incremental state:
+    - state.json: last processed block number and its date
+    - daily_counts.parquet: blocks per (date, recipient)
+    - daily_centrality.parquet: per-day rank shares and centrality metrics
+    (block_gaps.parquet, the missing-block index, is maintained alongside)
+    """
+    state_file = os.path.join(state_dir, 'state.json')
+    if os.path.exists(state_file):
+        with open(state_file, 'r') as file:
+            state = json.load(file)
+    else:
+        state = {'last_block': None, 'last_date': None}
+
+    counts_file = os.path.join(state_dir, 'daily_counts.parquet')
+    counts = pd.read_parquet(counts_file) if os.path.exists(counts_file) else None
+
+    metrics_file = os.path.join(state_dir, 'daily_centrality.parquet')
+    metrics = pd.read_parquet(metrics_file) if os.path.exists(metrics_file) else None
+
+    return state, counts, metrics
+
+def save_state(state_dir, state, counts, metrics):
+    """Persist the incremental state written by update_daily_centrality"""
+    os.makedirs(state_dir, exist_ok=True)
+    counts.to_parquet(os.path.join(state_dir, 'daily_counts.parquet'), index=False)
+    metrics.to_parquet(os.path.join(state_dir, 'daily_centrality.parquet'), index=False)
+    with open(os.path.join(state_dir, 'state.json'), 'w') as file:
+        json.dump(state, file, indent=2)
+
+def update_daily_centrality(new_blocks, state_dir, top_k=20):
+    """
+    Fold new blocks into the persisted per-day recipient counts and recompute
+    centrality metrics for the affected days only.
+
+    Blocks at or below the last processed block are ignored, so the same
+    blocks can be passed twice safely. Returns the metrics rows of the
+    affected days (empty if there was nothing new).
+    """
+    state, counts, metrics = load_state(state_dir)
+
+    blocks = new_blocks
+    if state['last_block'] is not None:
+        blocks = blocks[blocks['Block'] > state['last_block']]
+    if len(blocks) == 0:
+        print("No new blocks since the last update")
+        return pd.DataFrame()
+
+    new_counts = count_blocks_by_period(blocks, 'day', recipient_col=RECIPIENT_COL)
+    affected_days = new_counts['date'].unique()
+
+    # Merge the new counts into the stored counts of the affected days
+    if counts is not None:
+        touched = counts['date'].isin(affected_days)
+        new_counts = pd.concat([counts[touched], new_counts], ignore_index=True)
+        new_counts = new_counts.groupby(['date', RECIPIENT_COL], dropna=False, sort=False)['blocks'] \
+                               .sum().reset_index()
+        counts = pd.concat([counts[~touched], new_counts], ignore_index=True)
+    else:
+        counts = new_counts
+
+    affected = rank_share_matrix(new_counts, top_k=top_k, period_col='date', recipient_col=RECIPIENT_COL)
+    affected = add_centrality_metrics(affected, top_k=top_k)
+
+    if metrics is not None:
+        metrics = metrics[~metrics['date'].isin(affected_days)]
+        metrics = pd.concat([metrics, affected], ignore_index=True)
+    else:
+        metrics = affected
+    metrics = metrics.sort_values('date').reset_index(drop=True)
+
+    # Extend the gap index with gaps inside the new blocks and at the seam
+    # with the previously processed ones
+    gaps_file = os.path.join(state_dir, 'block_gaps.parquet')
+    seam = [] if state['last_block'] is None else [state['last_block']]
+    new_gaps = find_block_gaps(np.r_[seam, blocks['Block'].to_numpy(dtype=np.int64)])
+    if os.path.exists(gaps_file):
+        new_gaps = pd.concat([load_gap_index(gaps_file), new_gaps], ignore_index=True)
+    os.makedirs(state_dir, exist_ok=True)
+    save_gap_index(new_gaps, gaps_file)
+
+    last = blocks.loc[blocks['Block'].idxmax()]
+    state['last_block'] = int(last['Block'])
+    state['last_date'] = str(pd.Timestamp(last['DateTime (UTC)']).date())
+    save_state(state_dir, state, counts.sort_values('date').reset_index(drop=True), metrics)
+
+    print(f"✅ Processed {len(blocks):,} new blocks, updated {len(affected_days)} days "
+          f"(last block {state['last_block']:,})")
+    return affected
+
+def update_from_block_store(store_dir, state_dir, top_k=20):
+    """Read only the blocks newer than the last processed block from the block store"""
+    state, _, _ = load_state(state_dir)
+    new_blocks = load_blocks(store_dir, columns=BLOCK_COLUMNS, start_date=state['last_date'])
+    return update_daily_centrality(new_blocks, state_dir, top_k=top_k)
+
+def refresh_regression_data(regression_data, affected, market_data, lag=1):
+    """
+    Update the daily regression dataset for the affected days only.
+
+    `regression_data` is the existing daily_regression_data frame, `affected`
+    the rows returned by update_daily_centrality and `market_data` the merged
+    market frame (`df` in ETH_daily_analysis.ipynb). Rows from the first
+    affected day onwards are rebuilt and only their lag columns recomputed.
+    """
+    if len(affected) == 0:
+        return regression_data
+
+    first_day = affected['date'].min()
+    new_rows = pd.merge(affected, market_data, on='date', how='inner')
+    new_rows['eth_turnover'] = new_rows['eth_volume_million'] / new_rows['eth_marketcap_million']
+    new_rows['market_turnover'] = new_rows['market_volume_million'] / new_rows['market_marketcap_million']
+
+    # Keep unaffected days after the first affected one (late-arriving blocks)
+    kept = regression_data[~regression_data['date'].isin(affected['date'])]
+    head = kept[kept['date'] < first_day]
+    tail = pd.concat([kept[kept['date'] >= first_day], new_rows], ignore_index=True)
+    tail = tail.sort_values('date').reset_index(drop=True)
+
+    # Lags of the tail only need the last `lag` rows of the untouched head
+    context = head.tail(lag)
+    combined = pd.concat([context, tail], ignore_index=True)
+    for var in LAG_VARS:
+        if var in combined.columns:
+            combined[f'{var}_lag{lag}'] = combined[var].shift(lag)
+    tail = combined.iloc[len(context):]
+
+    tail = tail[regression_data.columns].dropna()
+    return pd.concat([head, tail], ignore_index=True)
+
+if __name__ == "__main__":
+    store_dir = "../data/raw/ETH_Block_Store"
+    state_dir = "../data/processed/centrality_state"
+
+    print("=== Incremental Daily Centrality Update ===")
+
+    if not os.path.isdir(store_dir):
+        print(f"❌ Block store not found: {store_dir}")
+        print("Please run the preprocessing script first!")
+        exit(1)
+
+    # --events FILE / --profile DIR record stage timings and cProfile dumps
+    configure_from_argv()
+    with StageTimer('daily_centrality_update') as stage:
+        affected = update_from_block_store(store_dir, state_dir)
+        stage.count('affected_days', len(affected))
+    if len(affected):
+        print(affected[['date', 'top1_centrality', 'top20_mean', 'hhi', 'gini']].tail())
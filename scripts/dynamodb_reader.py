@@ -0,0 +1,214 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from bulk_upload import dynamodb, table_name, RateLimiter, backoff_delay
+
+CACHE_DIR = '../data/raw/dynamodb_cache'
+
+# Attribute types written by bulk_upload.convert_csv_row_to_dynamodb_item
+ATTRIBUTE_TYPES = {
+    'Date': 'S',
+    'Block': 'N',
+    'DateTime (UTC)': 'S',
+    'Slot': 'N',
+    'Epoch': 'N',
+    'BlobCount': 'S',
+    'Txn': 'N',
+    'Fee Recipient': 'S',
+    'Fee Recipient Nametag': 'S',
+    'Gas Used': 'N',
+    'Gas Used(%)': 'S',
+    ' % Of Gas Target': 'S',
+    'Gas Limit': 'N',
+    'Base Fee': 'S',
+    'Reward': 'S',
+    'Burnt Fees (ETH)': 'N',
+    'Burnt Fees (%)': 'S',
+}
+INT_ATTRIBUTES = ['Block', 'Slot', 'Epoch', 'Txn', 'Gas Used', 'Gas Limit']
+
+NULL = {'NULL': True}
+
+def decode_items(items, columns):
+    """
+    Decode a page of typed attribute maps ({'N': '...'}, {'S': '...'},
+    {'NULL': True}) column by column into numpy arrays: integer attributes
+    as nullable Int64, other numbers as float64, strings as object with None
+    for NULL or missing attributes.
+    """
+    decoded = {}
+    for col in columns:
+        kind = ATTRIBUTE_TYPES.get(col, 'S')
+        values = [item.get(col, NULL).get(kind) for item in items]
+        if kind == 'N' and col in INT_ATTRIBUTES and None not in values:
+            try:
+                # Fast path for complete integer columns (block numbers, slots, ...)
+                decoded[col] = pd.array(np.fromiter(map(int, values), np.int64, len(values)), dtype='Int64')
+                continue
+            except ValueError:
+                pass
+        if kind == 'N':
+            numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+            decoded[col] = numbers.astype('Int64' if col in INT_ATTRIBUTES else 'float64').array
+        else:
+            decoded[col] = np.array(values, dtype=object)
+    return decoded
+
+def _frame(pages, columns):
+    """One DataFrame from decoded pages, in page order"""
+    if not pages:
+        return pd.DataFrame({col: decode_items([], [col])[col] for col in columns})
+    return pd.DataFrame({
+        col: np.concatenate([page[col] for page in pages]) if ATTRIBUTE_TYPES.get(col, 'S') == 'S'
+        else pd.concat([pd.Series(page[col]) for page in pages], ignore_index=True).array
+        for col in columns
+    })
+
+def _request_kwargs(columns):
+    """Projection of `columns` (attribute names contain spaces, so all go through placeholders)"""
+    names = {f'#c{i}': col for i, col in enumerate(columns)}
+    return {
+        'TableName': table_name,
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names,
+        'ReturnConsumedCapacity': 'TOTAL',
+    }
+
+def _paginate(call, kwargs, columns, rate_limiter=None, max_retries=8):
+    """
+    Follow LastEvaluatedKey through every page of a Query or Scan, decoding
+    each page as it arrives. Throttled or failed requests are retried with
+    jittered backoff; with a `rate_limiter` the full read units each page
+    consumed are charged (a 1 MB page can cost more than a second of the
+    cap) and paid off before the next request.
+    """
+    pages = []
+    start_key = None
+    while True:
+        request = dict(kwargs, ExclusiveStartKey=start_key) if start_key else kwargs
+        for attempt in range(max_retries):
+            try:
+                response = call(**request)
+                break
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"⚠️  Read failed (attempt {attempt + 1}), retrying in {delay:.2f}s: {str(e)}")
+                time.sleep(delay)
+
+        pages.append(decode_items(response['Items'], columns))
+        if rate_limiter:
+            rate_limiter.charge(response.get('ConsumedCapacity', {}).get('CapacityUnits', 1))
+        start_key = response.get('LastEvaluatedKey')
+        if not start_key:
+            return pages
+
+def query_date(date, columns=None, client=None, rate_limiter=None):
+    """All blocks of one Date partition, ordered by Block"""
+    client = client or dynamodb
+    columns = list(columns or ATTRIBUTE_TYPES)
+    kwargs = _request_kwargs(columns)
+    kwargs['ExpressionAttributeNames']['#date'] = 'Date'
+    kwargs.update(KeyConditionExpression='#date = :date', ExpressionAttributeValues={':date': {'S': date}})
+    return _frame(_paginate(client.query, kwargs, columns, rate_limiter), columns)
+
+def read_date_range(start_date, end_date, columns=None, client=None, max_workers=16,
+                    max_read_units_per_second=None, cache_dir=CACHE_DIR, refresh=False):
+    """
+    Blocks with Date in [start_date, end_date], one Query per Date partition
+    fanned out over `max_workers` threads (a partition's pages are read in
+    sequence, partitions in parallel), optionally capped at
+    `max_read_units_per_second` read capacity units.
+
+    Every complete past day is written to `cache_dir` as {date}.parquet and
+    read from there on later calls (unless `refresh`), so only missing days
+    and today hit the table. Returns one DataFrame sorted by Block.
+    """
+    client = client or dynamodb
+    columns = list(columns or ATTRIBUTE_TYPES)
+    dates = [day.strftime('%Y-%m-%d') for day in pd.date_range(start_date, end_date, freq='D')]
+    today = pd.Timestamp.now(tz='UTC').strftime('%Y-%m-%d')
+    rate_limiter = RateLimiter(max_read_units_per_second) if max_read_units_per_second else None
+
+    frames = {}
+    pending = []
+    for date in dates:
+        cache_file = os.path.join(cache_dir, f'{date}.parquet') if cache_dir else None
+        if cache_file and not refresh and date < today and os.path.exists(cache_file):
+            cached = pd.read_parquet(cache_file)
+            if set(columns).issubset(cached.columns):
+                frames[date] = cached[columns]
+                continue
+        pending.append(date)
+
+    if pending:
+        print(f"Querying {len(pending)} of {len(dates)} days from {table_name} ({max_workers} workers)")
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(query_date, date, columns, client, rate_limiter): date for date in pending}
+            for completed, future in enumerate(as_completed(futures), 1):
+                date = futures[future]
+                frames[date] = future.result()
+                if cache_dir and date < today:
+                    # Write atomically so an interrupted run never leaves a truncated day behind
+                    cache_file = os.path.join(cache_dir, f'{date}.parquet')
+                    frames[date].to_parquet(cache_file + '.tmp', index=False)
+                    os.replace(cache_file + '.tmp', cache_file)
+                if completed % 50 == 0:
+                    print(f"Progress: {completed} / {len(pending)} days")
+
+    non_empty = [frames[date] for date in dates if len(frames[date])]
+    if not non_empty:
+        return frames[dates[0]].iloc[:0] if dates else _frame([], columns)
+    df = pd.concat(non_empty, ignore_index=True)
+    return df.sort_values('Block').reset_index(drop=True) if 'Block' in df.columns else df
+
+def _scan_segment(segment, total_segments, columns, client, rate_limiter):
+    kwargs = dict(_request_kwargs(columns), Segment=segment, TotalSegments=total_segments)
+    return _paginate(client.scan, kwargs, columns, rate_limiter)
+
+def scan_table(columns=None, client=None, total_segments=16, max_read_units_per_second=None):
+    """
+    Full export with a parallel Scan: `total_segments` segments read
+    concurrently, one thread each. Returns one DataFrame sorted by Block.
+    """
+    client = client or dynamodb
+    columns = list(columns or ATTRIBUTE_TYPES)
+    rate_limiter = RateLimiter(max_read_units_per_second) if max_read_units_per_second else None
+
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        segments = executor.map(lambda segment: _scan_segment(segment, total_segments, columns, client, rate_limiter),
+                                range(total_segments))
+        pages = [page for segment_pages in segments for page in segment_pages]
+
+    df = _frame(pages, columns)
+    return df.sort_values('Block').reset_index(drop=True) if 'Block' in df.columns else df
+
+if __name__ == "__main__":
+    import sys
+
+    print("=== DynamoDB Read ===")
+    start_time = time.time()
+
+    if "--scan" in sys.argv:
+        # Full export straight into the Parquet block store
+        from block_store import write_block_store
+
+        store_dir = "../data/raw/ETH_Block_Store"
+        df = scan_table()
+        print(f"✅ Scanned {len(df):,} blocks in {time.time() - start_time:.1f}s")
+        write_block_store(df, store_dir)
+        print(f"✅ Block store written: {store_dir}")
+    else:
+        dates = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+        end_date = dates[1] if len(dates) > 1 else pd.Timestamp.now(tz='UTC').strftime('%Y-%m-%d')
+        start_date = dates[0] if dates else (pd.Timestamp(end_date) - pd.Timedelta(days=365)).strftime('%Y-%m-%d')
+        df = read_date_range(start_date, end_date)
+        print(f"✅ Read {len(df):,} blocks ({start_date} to {end_date}) in {time.time() - start_time:.1f}s")
+        if len(df):
+            print(df[['Date', 'Block', 'DateTime (UTC)', 'Fee Recipient']].head())
@@ -0,0 +1,196 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Same events and controls as event_study_regression.ipynb
+EVENTS = {
+    'nethermind': '2024-01-21',
+    'shanghai': '2023-04-12'
+}
+DEFAULT_CONTROLS = ['market_return', 'eth_return', 'eth_turnover']
+DEFAULT_OUTCOMES = ['top20_mean', 'prof_garman_klass_vol']
+
+# A window definition is a list of (segment, first_day, last_day) relative to
+# the event date, each becoming one dummy. The notebook uses days 0-7 and 8-30.
+DEFAULT_WINDOWS = {
+    '0-7/8-30': [('event', 0, 7), ('post', 8, 30)],
+}
+
+def window_grid(event_ends=(3, 5, 7, 10, 14), post_ends=(30, 45, 60)):
+    """Window definitions 0-e / (e+1)-p for every event-window end e and post-window end p"""
+    return {
+        f'0-{e}/{e + 1}-{p}': [('event', 0, e), ('post', e + 1, p)]
+        for e, p in itertools.product(event_ends, post_ends) if p > e
+    }
+
+def _day_numbers(dates):
+    return pd.DatetimeIndex(dates).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+def event_dummies(dates, event_date, segments):
+    """One 0/1 column per segment, set on days event_date + first_day ... + last_day"""
+    offset = _day_numbers(dates) - _day_numbers([event_date])[0]
+    return np.column_stack([(offset >= first) & (offset <= last) for _, first, last in segments]).astype(np.float64)
+
+def batched_ols(X, Y):
+    """
+    OLS of every column of Y on the same X from one QR factorization, with
+    HC3 standard errors and normal p-values (statsmodels' fit(cov_type='HC3')).
+
+    Returns (coef, se, pvalues) of shape (n_outcomes, k) and r_squared of
+    shape (n_outcomes,).
+    """
+    n, k = X.shape
+    Q, R = np.linalg.qr(X)
+    R_inv = np.linalg.inv(R)
+
+    coef = np.linalg.solve(R, Q.T @ Y).T
+    residuals = Y - X @ coef.T
+    leverage = np.einsum('ij,ij->i', Q, Q)
+
+    # Sandwich (X'X)^-1 X' diag(e^2 / (1-h)^2) X (X'X)^-1 for all outcomes at once
+    bread = R_inv @ Q.T
+    weights = residuals ** 2 / (1 - leverage)[:, None] ** 2
+    cov = np.einsum('kn,nm,ln->mkl', bread, weights, bread)
+    se = np.sqrt(np.einsum('mkk->mk', cov))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pvalues = 2 * stats.norm.sf(np.abs(coef / se))
+        centered = Y - Y.mean(axis=0)
+        r_squared = 1 - (residuals ** 2).sum(axis=0) / (centered ** 2).sum(axis=0)
+    return coef, se, pvalues, r_squared
+
+def _fit_spec(days, columns, event, event_date, window, segments, control_set, controls, outcomes):
+    """Fit all outcomes of one (event, window, control set) design, sharing the factorization"""
+    dummy_names = [f'{event}_{segment}' for segment, _, _ in segments]
+    terms = ['const'] + dummy_names + list(controls)
+    outcomes = [outcome for outcome in outcomes if outcome not in controls]
+
+    offset = days - _day_numbers([event_date])[0]
+    design = np.column_stack(
+        [np.ones(len(days))]
+        + [(offset >= first) & (offset <= last) for _, first, last in segments]
+        + [columns[control] for control in controls]
+    ).astype(np.float64)
+    Y_all = np.column_stack([columns[outcome] for outcome in outcomes])
+    design_valid = np.isfinite(design).all(axis=1)
+
+    # Outcomes with the same missing-value pattern share one design matrix
+    rows = []
+    valid = design_valid[:, None] & np.isfinite(Y_all)
+    patterns = {}
+    for j in range(len(outcomes)):
+        patterns.setdefault(valid[:, j].tobytes(), []).append(j)
+
+    for group in patterns.values():
+        mask = valid[:, group[0]]
+        X = design[mask]
+        if np.linalg.matrix_rank(X) < X.shape[1]:
+            print(f"⚠️  Skipping {event} {window} ({control_set}): singular design "
+                  f"(event window outside the data?)")
+            continue
+        coef, se, pvalues, r_squared = batched_ols(X, Y_all[mask][:, group])
+
+        for i, j in enumerate(group):
+            for t, term in enumerate(terms):
+                rows.append({
+                    'event': event,
+                    'event_date': event_date,
+                    'window': window,
+                    'control_set': control_set,
+                    'outcome': outcomes[j],
+                    'term': term,
+                    'coef': coef[i, t],
+                    'se': se[i, t],
+                    'z': coef[i, t] / se[i, t],
+                    'p_value': pvalues[i, t],
+                    'nobs': int(mask.sum()),
+                    'r_squared': r_squared[i],
+                })
+    return rows
+
+def run_event_study(df, events=EVENTS, outcomes=DEFAULT_OUTCOMES, windows=DEFAULT_WINDOWS,
+                    control_sets=None, max_workers=None):
+    """
+    Estimate every (event, window definition, control set, outcome) event
+    regression of event_study_regression.ipynb in one call.
+
+    Each (event, window, control set) design is factorized once and solved for
+    all outcomes with the same sample, and designs are fitted in parallel
+    threads. `control_sets` maps a name to a control list (default: the
+    notebook's controls); e.g. adding {'with_top20_mean': controls +
+    ['top20_mean']} gives the mediation Model B. Outcomes that are also
+    controls in a set are skipped for that set.
+
+    Returns one tidy DataFrame with coef / se / z / p_value per term.
+    """
+    control_sets = control_sets or {'base': DEFAULT_CONTROLS}
+    df = df.sort_values('date').reset_index(drop=True)
+
+    # Convert once; every design is assembled from these arrays
+    days = _day_numbers(df['date'])
+    needed = set(outcomes).union(*control_sets.values())
+    columns = {name: df[name].to_numpy(dtype=np.float64) for name in needed}
+
+    specs = [
+        (event, event_date, window, segments, control_set, controls)
+        for event, event_date in events.items()
+        for window, segments in windows.items()
+        for control_set, controls in control_sets.items()
+    ]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda spec: _fit_spec(days, columns, *spec, outcomes), specs)
+        rows = [row for spec_rows in results for row in spec_rows]
+
+    return pd.DataFrame(rows)
+
+def event_effects(results):
+    """Keep only the event-dummy rows (drops const and controls)"""
+    is_dummy = [term.startswith(f'{event}_') for term, event in zip(results['term'], results['event'])]
+    return results[is_dummy].reset_index(drop=True)
+
+def mediation_table(results, base='base', mediated='with_top20_mean', outcome='prof_garman_klass_vol'):
+    """
+    Compare event effects on `outcome` without (Model A) and with (Model B)
+    the mediator, with the attenuation printed in the notebook.
+    """
+    effects = event_effects(results)
+    effects = effects[effects['outcome'] == outcome]
+    keys = ['event', 'window', 'term']
+    model_a = effects[effects['control_set'] == base].set_index(keys)[['coef', 'p_value']]
+    model_b = effects[effects['control_set'] == mediated].set_index(keys)[['coef', 'p_value']]
+
+    table = model_a.join(model_b, lsuffix='_A', rsuffix='_B', how='inner')
+    table['attenuation'] = np.where(table['coef_A'] != 0,
+                                    (table['coef_A'] - table['coef_B']) / table['coef_A'] * 100, 0.0)
+    return table.reset_index()
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    print("=== Event Study Window Sensitivity ===")
+    df = pd.read_csv('../data/processed/daily_regression_data.csv')
+    df['date'] = pd.to_datetime(df['date'])
+
+    windows = {**DEFAULT_WINDOWS, **window_grid()}
+    control_sets = {'base': DEFAULT_CONTROLS, 'with_top20_mean': DEFAULT_CONTROLS + ['top20_mean']}
+
+    start_time = time.time()
+    results = run_event_study(df, windows=windows, control_sets=control_sets)
+    print(f"✅ {len(results):,} coefficients from {len(EVENTS) * len(windows) * len(control_sets)} "
+          f"designs in {time.time() - start_time:.2f}s")
+
+    os.makedirs('../results', exist_ok=True)
+    results.to_csv('../results/event_study_grid.csv', index=False)
+    print("Results saved as '../results/event_study_grid.csv'")
+
+    effects = event_effects(results)
+    base = effects[(effects['window'] == '0-7/8-30') & (effects['control_set'] == 'base')]
+    print("\nNotebook specification (days 0-7 / 8-30):")
+    print(base[['event', 'outcome', 'term', 'coef', 'se', 'p_value', 'nobs']].to_string(index=False))
+
+    print("\nMediation (Model A vs Model B):")
+    print(mediation_table(results).query("window == '0-7/8-30'").to_string(index=False))
@@ -0,0 +1,97 @@
+import re
+import numpy as np
+import pandas as pd
+
+from volatility import rolling_moments
+
+# Feature names use the suffixes the notebooks already use, applied right to left:
+# x_lag{k}, x_lead{k}, x_diff, x_pct (pct change), x_ma{w} (rolling mean), e.g. hhi_diff_lag1
+TRANSFORM_PATTERN = re.compile(r'^(?P<base>.+)_(?:(?P<kind>lag|lead|ma)(?P<k>\d+)|(?P<simple>diff|pct))$')
+
+def feature_names(variables, lags=(), leads=(), diff=False, pct=False, rolling=()):
+    """Names for every variable x transform, e.g. feature_names(['interest_rate'], lags=range(1, 91))"""
+    names = []
+    for variable in variables:
+        if diff:
+            names.append(f'{variable}_diff')
+        if pct:
+            names.append(f'{variable}_pct')
+        names += [f'{variable}_lag{k}' for k in lags]
+        names += [f'{variable}_lead{k}' for k in leads]
+        names += [f'{variable}_ma{w}' for w in rolling]
+    return names
+
+class FeatureMatrix:
+    """
+    Lazily built feature columns over a base DataFrame.
+
+    A feature is any column of the frame or a transform of one named by
+    suffix (see TRANSFORM_PATTERN). Nothing is computed until `matrix` or
+    `frame` is called with the names a model needs; those are written
+    straight into one float64 array allocated once, each base column being
+    converted to numpy only once. Stored columns take precedence, so an
+    existing 'hhi_diff' column is used as is.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.index = df.index
+        self._base = {}
+
+    def _base_column(self, name):
+        if name not in self._base:
+            self._base[name] = self.df[name].to_numpy(dtype=np.float64)
+        return self._base[name]
+
+    def _values(self, name, out=None):
+        """Values of one feature, written into `out` (a 1-D float64 view) when given"""
+        out = np.empty(len(self.index)) if out is None else out
+        if name in self.df.columns:
+            out[:] = self._base_column(name)
+            return out
+
+        match = TRANSFORM_PATTERN.match(name)
+        if match is None:
+            raise KeyError(f"'{name}' is neither a column nor a known transform")
+        inner = self._values(match['base'])
+        kind = match['kind'] or match['simple']
+        k = int(match['k'] or 1)
+        # Lags and leads past the end of the series are all NaN; ma windows are not clamped
+        shift = min(k, len(inner))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if kind == 'lag':
+                out[:shift] = np.nan
+                out[shift:] = inner[:len(inner) - shift]
+            elif kind == 'lead':
+                out[len(inner) - shift:] = np.nan
+                out[:len(inner) - shift] = inner[shift:]
+            elif kind == 'diff':
+                out[:1] = np.nan
+                np.subtract(inner[1:], inner[:-1], out=out[1:])
+            elif kind == 'pct':
+                out[:1] = np.nan
+                np.divide(inner[1:], inner[:-1], out=out[1:])
+                out[1:] -= 1
+            else:
+                out[:] = rolling_moments(inner, [k])[0][0]
+        return out
+
+    def matrix(self, names):
+        """The requested features as one (n_rows, len(names)) float64 array with contiguous columns"""
+        out = np.empty((len(self.index), len(names)), order='F')
+        for j, name in enumerate(names):
+            self._values(name, out[:, j])
+        return out
+
+    def frame(self, names):
+        """The requested features as a DataFrame backed by a single block (no per-column copies)"""
+        names = list(names)
+        return pd.DataFrame(self.matrix(names), index=self.index, columns=names, copy=False)
+
+def add_features(df, names):
+    """Return `df` with the features in `names` that it lacks appended in one concat"""
+    missing = [name for name in dict.fromkeys(names) if name not in df.columns]
+    if not missing:
+        return df
+    return pd.concat([df, FeatureMatrix(df).frame(missing)], axis=1)
@@ -0,0 +1,67 @@
+import os
+import numpy as np
+import pandas as pd
+
+from aggregation import assign_periods, PERIOD_COLUMNS
+
+def find_block_gaps(blocks):
+    """
+    Build a run-length index of missing block numbers.
+
+    Works on the block-number array with a vectorized diff instead of
+    materializing the full block range, so memory is proportional to the
+    number of blocks we have and the result to the number of gaps.
+    Returns a DataFrame with columns start, end, length (inclusive ranges).
+    """
+    blocks = np.sort(np.asarray(blocks, dtype=np.int64))
+    steps = np.diff(blocks)
+    after = np.flatnonzero(steps > 1)
+
+    return pd.DataFrame({
+        'start': blocks[after] + 1,
+        'end': blocks[after + 1] - 1,
+        'length': steps[after] - 1,
+    })
+
+def save_gap_index(gaps, path):
+    """Persist the gap index (Parquet), creating its directory if needed"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    gaps.to_parquet(path, index=False)
+
+def load_gap_index(path):
+    """Load a gap index written by save_gap_index"""
+    return pd.read_parquet(path)
+
+def format_gaps(gaps):
+    """Render gaps as 'Block N' / 'Blocks N-M' strings like the notebooks printed"""
+    return [
+        f"Block {start}" if start == end else f"Blocks {start}-{end}"
+        for start, end in zip(gaps['start'], gaps['end'])
+    ]
+
+def coverage_by_period(blocks_df, freq='day', time_col='DateTime (UTC)', epoch_col='Epoch'):
+    """
+    Report block coverage per period.
+
+    Each gap is attributed to the period of the block right before it, so
+    `missing` per period sums to the total number of missing blocks.
+    Returns a DataFrame with columns [period, blocks, missing, coverage].
+    """
+    period_col = PERIOD_COLUMNS[freq]
+    ordered = blocks_df.sort_values('Block')
+    block_numbers = ordered['Block'].to_numpy(dtype=np.int64)
+    missing_after = np.r_[np.maximum(np.diff(block_numbers) - 1, 0), 0]
+
+    coverage = pd.DataFrame({
+        period_col: assign_periods(ordered, freq, time_col=time_col, epoch_col=epoch_col).to_numpy(),
+        'blocks': 1,
+        'missing': missing_after,
+    }).groupby(period_col).sum().reset_index()
+
+    coverage['coverage'] = coverage['blocks'] / (coverage['blocks'] + coverage['missing']) * 100
+    return coverage
+
+def total_coverage(gaps, min_block, max_block):
+    """Percentage of the block range [min_block, max_block] that is present"""
+    range_size = max_block - min_block + 1
+    return (range_size - gaps['length'].sum()) / range_size * 100
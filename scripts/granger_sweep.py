@@ -0,0 +1,221 @@
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from features import add_features
+
+# Differenced centrality series tested in Daily_VAR.ipynb, VAR.ipynb and ETH_VAR.ipynb
+CENTRALITY_METRICS = ('top1_centrality_diff', 'top3_centrality_diff', 'top5_centrality_diff',
+                      'top10_centrality_diff', 'hhi_diff', 'gini_diff')
+DEFAULT_MAX_LAGS = (4, 8, 12, 20)
+
+# Data set, volatility measures and VAR controls per frequency (as in the notebooks)
+FREQUENCIES = {
+    'daily': {
+        'data_file': '../data/processed/daily_regression_data.csv',
+        'date_column': 'date',
+        'volatility': ('prof_yang_zhang_vol', 'prof_garman_klass_vol'),
+        'controls': ('market_volatility', 'market_return', 'market_turnover', 'eth_return', 'eth_turnover'),
+    },
+    'weekly': {
+        'data_file': '../data/processed/eth_regression_data.csv',
+        'date_column': 'week_start',
+        'volatility': ('weekly_vol_annualized_diff',),
+        'controls': ('market_weekly_vol_annualized', 'weekly_mean_return', 'weekly_abs_return',
+                     'market_weekly_return', 'eth_weekly_turnover', 'market_weekly_turnover'),
+    },
+}
+
+def load_frequency(frequency):
+    """Load the data set of one frequency sorted by date"""
+    config = FREQUENCIES[frequency]
+    df = pd.read_csv(config['data_file'])
+    df[config['date_column']] = pd.to_datetime(df[config['date_column']])
+    return df.sort_values(config['date_column']).reset_index(drop=True)
+
+def add_differences(df, columns):
+    """Add `{name}_diff` first differences for requested `_diff` columns that are not stored"""
+    return add_features(df, [column for column in columns
+                             if column.endswith('_diff') and column[:-len('_diff')] in df.columns])
+
+def lag_matrix(x, max_lag):
+    """Columns x_{t-1} ... x_{t-max_lag} (NaN before the series starts)"""
+    x = np.asarray(x, dtype=np.float64)
+    lags = np.full((len(x), max_lag), np.nan)
+    for lag in range(1, max_lag + 1):
+        lags[lag:, lag - 1] = x[:-lag]
+    return lags
+
+def granger_tests(effect, cause, max_lag, effect_lags=None, cause_lags=None):
+    """
+    SSR F-tests of `cause` Granger-causing `effect` for lags 1 ... max_lag,
+    matching grangercausalitytests(np.column_stack([effect, cause]))[lag][0]['ssr_ftest'].
+
+    Each lag uses the sample after its first `lag` rows. The restricted and
+    unrestricted models share one QR factorization (the restricted design is
+    a prefix of the unrestricted one), and lag matrices can be passed in to be
+    reused across tests. Returns (F, p_value) arrays of length max_lag.
+    """
+    effect = np.asarray(effect, dtype=np.float64)
+    effect_lags = lag_matrix(effect, max_lag) if effect_lags is None else effect_lags
+    cause_lags = lag_matrix(cause, max_lag) if cause_lags is None else cause_lags
+
+    f_stats = np.full(max_lag, np.nan)
+    p_values = np.full(max_lag, np.nan)
+    for lag in range(1, max_lag + 1):
+        y = effect[lag:]
+        df_resid = len(y) - 2 * lag - 1
+        if df_resid <= 0:
+            break
+        X = np.column_stack([np.ones(len(y)), effect_lags[lag:, :lag], cause_lags[lag:, :lag]])
+        Q, _ = np.linalg.qr(X)
+        projection = Q.T @ (y - y.mean())
+
+        # The constant's projection of centered y is zero, so the restricted RSS drops it too
+        total = ((y - y.mean()) ** 2).sum()
+        rss_restricted = total - (projection[:1 + lag] ** 2).sum()
+        rss_full = total - (projection ** 2).sum()
+        f_stats[lag - 1] = (rss_restricted - rss_full) / lag / (rss_full / df_resid)
+        p_values[lag - 1] = stats.f.sf(f_stats[lag - 1], lag, df_resid)
+    return f_stats, p_values
+
+def var_select_order(data, max_lag):
+    """
+    VAR lag-order selection with a constant, matching
+    VAR(data).select_order(maxlags=max_lag).selected_orders.
+
+    All orders 0 ... max_lag are fitted on the sample after the first max_lag
+    rows. Their designs are prefixes of the max_lag design, so one QR
+    factorization gives every order's residual covariance as a running sum.
+    Returns ({criterion: selected order}, nobs).
+    """
+    data = np.asarray(data, dtype=np.float64)
+    T, k = data.shape
+    nobs = T - max_lag
+    Y = data[max_lag:]
+    X = np.column_stack([np.ones(nobs)] + [data[max_lag - lag:T - lag] for lag in range(1, max_lag + 1)])
+    Q, _ = np.linalg.qr(X)
+    projection = Q.T @ (Y - Y.mean(axis=0))
+
+    centered = Y - Y.mean(axis=0)
+    residual_cross = centered.T @ centered
+    explained = np.cumsum(np.einsum('ri,rj->rij', projection[1:], projection[1:]), axis=0)
+
+    criteria = {'aic': [], 'bic': [], 'hqic': [], 'fpe': []}
+    for order in range(max_lag + 1):
+        cross = residual_cross - explained[k * order - 1] if order else residual_cross
+        df_model = k * order + 1
+        df_resid = nobs - df_model
+        free_params = order * k ** 2 + k
+        if df_resid > 0:
+            log_det = np.linalg.slogdet(cross / nobs)[1]
+        else:
+            log_det = -np.inf
+        criteria['aic'].append(log_det + 2 / nobs * free_params)
+        criteria['bic'].append(log_det + np.log(nobs) / nobs * free_params)
+        criteria['hqic'].append(log_det + 2 * np.log(np.log(nobs)) / nobs * free_params)
+        criteria['fpe'].append(((nobs + df_model) / df_resid) ** k * np.exp(log_det))
+    return {name: int(np.argmin(values)) for name, values in criteria.items()}, nobs
+
+def _sweep_pair(task):
+    """Granger tests in both directions and VAR order selection for one (metric, volatility) pair"""
+    frequency, metric, volatility, data, controls, max_lags = task
+    rows = []
+
+    # Lag matrices are built once at the largest lag and shared by both directions and all caps
+    pair = data[[metric, volatility]].dropna()
+    largest = max(max_lags)
+    metric_lags = lag_matrix(pair[metric], largest)
+    volatility_lags = lag_matrix(pair[volatility], largest)
+    _, forward_p = granger_tests(pair[volatility], pair[metric], largest, volatility_lags, metric_lags)
+    _, reverse_p = granger_tests(pair[metric], pair[volatility], largest, metric_lags, volatility_lags)
+
+    var_data = data[[metric] + list(controls) + [volatility]].dropna()
+    for max_lag in max_lags:
+        row = {
+            'frequency': frequency,
+            'metric': metric,
+            'volatility': volatility,
+            'max_lag': max_lag,
+            'nobs': len(pair),
+        }
+        # Centrality -> volatility (the notebooks' hypothesis) and the reverse direction
+        for prefix, p_values in (('granger', forward_p), ('reverse_granger', reverse_p)):
+            tested = p_values[:max_lag]
+            if np.isfinite(tested).any():
+                best = int(np.nanargmin(tested))
+                row[f'{prefix}_min_p'] = tested[best]
+                row[f'{prefix}_best_lag'] = best + 1
+            else:
+                row[f'{prefix}_min_p'] = np.nan
+                row[f'{prefix}_best_lag'] = np.nan
+        row['granger_significant_5pct'] = row['granger_min_p'] < 0.05
+
+        if len(var_data) > max_lag * (len(var_data.columns) + 1) + 1:
+            orders, var_nobs = var_select_order(var_data.to_numpy(), max_lag)
+            row['var_nobs'] = var_nobs
+            for criterion, order in orders.items():
+                row[f'var_{criterion}_order'] = order
+        rows.append(row)
+    return rows
+
+def granger_sweep(frequencies=None, metrics=CENTRALITY_METRICS, max_lags=DEFAULT_MAX_LAGS, data=None,
+                  max_workers=None):
+    """
+    Granger causality tests and VAR lag-order selection for every centrality
+    metric x volatility measure x max-lag cap x frequency.
+
+    `frequencies` maps a frequency to overrides of its FREQUENCIES entry
+    (e.g. {'daily': {'volatility': ['prof_parkinson_vol']}}); default both.
+    `data` optionally maps a frequency to an already loaded DataFrame.
+    Each (frequency, metric, volatility) pair runs in a process pool; within
+    a pair, the tests for every lag cap come from one pass up to the largest
+    cap, since smaller caps test a subset of the same lags.
+
+    Returns one table with a row per (frequency, metric, volatility, max_lag):
+    min F-test p-value and best lag in both directions, and the lag order
+    chosen by AIC / BIC / HQIC / FPE for a VAR of the metric, the frequency's
+    controls and the volatility measure.
+    """
+    frequencies = frequencies or {frequency: {} for frequency in FREQUENCIES}
+    tasks = []
+    for frequency, overrides in frequencies.items():
+        config = {**FREQUENCIES[frequency], **overrides}
+        needed = list(metrics) + list(config['volatility']) + list(config['controls'])
+        df = data[frequency] if data and frequency in data else load_frequency(frequency)
+        df = add_differences(df, needed)
+
+        missing = [column for column in needed if column not in df.columns]
+        if missing:
+            print(f"⚠️  Skipping {frequency}: columns not in the data: {missing}")
+            continue
+        for metric, volatility in itertools.product(metrics, config['volatility']):
+            tasks.append((frequency, metric, volatility, df[needed], config['controls'], tuple(max_lags)))
+
+    if len(tasks) <= 1 or max_workers == 1:
+        results = [_sweep_pair(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_sweep_pair, tasks))
+
+    return pd.DataFrame([row for pair_rows in results for row in pair_rows])
+
+if __name__ == "__main__":
+    import time
+
+    print("=== Granger Causality / VAR Lag Selection Sweep ===")
+    start_time = time.time()
+    results = granger_sweep()
+    print(f"✅ {len(results)} configurations in {time.time() - start_time:.2f}s")
+
+    os.makedirs('../results', exist_ok=True)
+    results.to_csv('../results/granger_var_sweep.csv', index=False)
+    print("Results saved as '../results/granger_var_sweep.csv'")
+
+    if len(results):
+        significant = results[results['granger_significant_5pct']]
+        print(f"\nCentrality -> volatility significant at 5%: {len(significant)} of {len(results)}")
+        print(results.sort_values('granger_min_p').head(10).to_string(index=False))
@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import functools
+import threading
+import contextlib
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Where stage events go: JSON lines appended to EVENTS_FILE, cProfile dumps
+# (one .prof per stage run) written to PROFILE_DIR. Both are off when unset.
+SETTINGS = {
+    'events_file': os.getenv('INSTRUMENTATION_EVENTS'),
+    'profile_dir': os.getenv('INSTRUMENTATION_PROFILE_DIR'),
+}
+
+_write_lock = threading.Lock()
+_profiling = threading.Lock()
+_quiet_lock = threading.Lock()
+_active = threading.local()
+
+def configure(events_file=None, profile_dir=None):
+    """Turn on JSON-lines events and / or per-stage cProfile dumps (None leaves a setting unchanged)"""
+    if events_file is not None:
+        SETTINGS['events_file'] = events_file
+    if profile_dir is not None:
+        SETTINGS['profile_dir'] = profile_dir
+
+def configure_from_argv(argv=None):
+    """Read `--events FILE` and `--profile DIR` from the command line, as the scripts' mains use flags"""
+    argv = sys.argv if argv is None else argv
+    for flag, key in (('--events', 'events_file'), ('--profile', 'profile_dir')):
+        if flag in argv and argv.index(flag) + 1 < len(argv):
+            SETTINGS[key] = argv[argv.index(flag) + 1]
+
+def current_rss():
+    """Resident set size of this process in bytes (Linux /proc, else peak RSS)"""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def emit_event(event):
+    """Append one event as a JSON line to the configured events file"""
+    events_file = SETTINGS['events_file']
+    if not events_file:
+        return
+    os.makedirs(os.path.dirname(events_file) or '.', exist_ok=True)
+    line = json.dumps(event, default=str)
+    with _write_lock, open(events_file, 'a') as file:
+        file.write(line + '\n')
+
+class _QuietStdout:
+    """sys.stdout stand-in dropping writes from threads inside a quiet stage; other threads print as usual"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.threads = {}
+
+    def write(self, text):
+        if threading.get_ident() in self.threads:
+            return len(text)
+        return self.stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def _set_quiet(quiet):
+    """Start (True) or end (False) suppressing the calling thread's prints"""
+    ident = threading.get_ident()
+    with _quiet_lock:
+        if quiet:
+            if not isinstance(sys.stdout, _QuietStdout):
+                sys.stdout = _QuietStdout(sys.stdout)
+            sys.stdout.threads[ident] = sys.stdout.threads.get(ident, 0) + 1
+        elif isinstance(sys.stdout, _QuietStdout) and ident in sys.stdout.threads:
+            sys.stdout.threads[ident] -= 1
+            if not sys.stdout.threads[ident]:
+                del sys.stdout.threads[ident]
+            if not sys.stdout.threads:
+                sys.stdout = sys.stdout.stream
+
+def current_stage():
+    """Innermost stage open on the calling thread (None outside any stage)"""
+    stages = getattr(_active, 'stages', None)
+    return stages[-1] if stages else None
+
+def latency_summary(values):
+    """count / mean / p50 / p99 / max of a list of durations, in seconds"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return {'count': 0}
+    p50, p99 = np.percentile(values, [50, 99])
+    return {
+        'count': len(values),
+        'mean': round(float(values.mean()), 6),
+        'p50': round(float(p50), 6),
+        'p99': round(float(p99), 6),
+        'max': round(float(values.max()), 6),
+    }
+
+class StageTimer:
+    """
+    Time one pipeline stage and sample RSS every `interval` seconds in a
+    background thread to record its peak.
+
+    Inside the block, `count` adds to named counters and `observe` records
+    per-item durations (e.g. one per upload batch); both are thread-safe, so
+    worker threads can report into the stage that owns them. On exit the
+    stage is emitted as one JSON-lines event (when an events file is
+    configured) with rows, bytes, wall time, peak RSS, counters and
+    p50 / p99 of every observed duration, and the calling thread's cProfile
+    stats are dumped when a profile directory is configured. When `quiet`,
+    prints of the calling thread are suppressed for the duration of the
+    stage (worker threads still print).
+    """
+
+    def __init__(self, name, rows=None, bytes=None, interval=0.01, quiet=False):
+        self.name = name
+        self.rows = rows
+        self.bytes = bytes
+        self.interval = interval
+        self.quiet = quiet
+        self.status = None
+        self.extra = {}
+        self.counters = {}
+        self.latencies = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        """Record the duration of the block as one `name` observation"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, current_rss())
+
+    def __enter__(self):
+        self.start_rss = self.peak_rss = current_rss()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        if self.quiet:
+            _set_quiet(True)
+        _active.stages = getattr(_active, 'stages', []) + [self]
+
+        # One profiler at a time: nested stages are covered by the outer one
+        self._profiler = None
+        if SETTINGS['profile_dir'] and _profiling.acquire(blocking=False):
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+        self.started = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        self.profile_file = None
+        if self._profiler:
+            self._profiler.disable()
+            os.makedirs(SETTINGS['profile_dir'], exist_ok=True)
+            self.profile_file = os.path.join(SETTINGS['profile_dir'],
+                                             f"{self.name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.prof")
+            self._profiler.dump_stats(self.profile_file)
+            _profiling.release()
+        _active.stages = [stage for stage in _active.stages if stage is not self]
+        if self.quiet:
+            _set_quiet(False)
+        self._stop.set()
+        self._sampler.join()
+        self.peak_rss = max(self.peak_rss, current_rss())
+
+        event = self.result()
+        event.update({
+            'event': 'stage',
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'status': 'error' if exc_type is not None else self.status or 'ok',
+            'pid': os.getpid(),
+        })
+        if exc_type is not None:
+            event['error'] = f"{exc_type.__name__}: {exc}"
+        if self.profile_file:
+            event['profile'] = self.profile_file
+        emit_event(event)
+        return False
+
+    def result(self):
+        result = {
+            'stage': self.name,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'seconds': round(self.seconds, 4),
+            'rows_per_second': round(self.rows / self.seconds, 1) if self.rows and self.seconds else None,
+            'peak_rss_mb': round(self.peak_rss / 2**20, 1),
+            'rss_delta_mb': round((self.peak_rss - self.start_rss) / 2**20, 1),
+        }
+        if self.counters:
+            result['counters'] = dict(self.counters)
+        if self.latencies:
+            result['latency'] = {name: latency_summary(values) for name, values in self.latencies.items()}
+        result.update(self.extra)
+        return result
+
+def instrumented(name, **extra):
+    """
+    Decorator running every call of the function as one StageTimer stage
+    (`extra` is added to its event). The function reaches the stage through
+    current_stage(); a return value of False is recorded as status 'failed'.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with StageTimer(name) as stage:
+                stage.extra.update(extra)
+                result = function(*args, **kwargs)
+                if result is False:
+                    stage.status = 'failed'
+            return result
+        return wrapper
+    return decorator
+
+def load_events(events_file):
+    """Read a JSON-lines events file into a list of dicts"""
+    with open(events_file, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+if __name__ == "__main__":
+    events_file = sys.argv[1] if len(sys.argv) > 1 else SETTINGS['events_file']
+    if not events_file or not os.path.exists(events_file):
+        print(f"❌ Events file not found: {events_file}")
+        exit(1)
+
+    print(f"=== Stage Events: {events_file} ===")
+    print(f"{'Stage':<28} {'Runs':>5} {'Seconds':>10} {'Rows':>12} {'Peak RSS MB':>12}  Latency p50 / p99")
+    stages = {}
+    for event in load_events(events_file):
+        if event.get('event') == 'stage':
+            stages.setdefault(event['stage'], []).append(event)
+
+    # Totals over all runs of a stage, latencies of its most recent run that recorded any
+    for name, runs in stages.items():
+        seconds = sum(run['seconds'] for run in runs)
+        rows = sum(run['rows'] or 0 for run in runs)
+        peak = max(run['peak_rss_mb'] for run in runs)
+        latencies = next((run['latency'] for run in reversed(runs) if run.get('latency')), {})
+        latency = ', '.join(f"{key} {value['p50']:.4f}s / {value['p99']:.4f}s"
+                            for key, value in latencies.items() if value['count'])
+        failed = sum(run['status'] != 'ok' for run in runs)
+        print(f"{name:<28} {len(runs):>5} {seconds:>10.2f} {rows:>12,} {peak:>12,}  {latency}"
+              f"{f'  ⚠️  {failed} failed' if failed else ''}")
@@ -0,0 +1,191 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from features import add_features, feature_names
+from market_data import treasury_rate
+
+# Specification of 2SLS.ipynb: volatility on instrumented centrality plus controls
+DEFAULT_OUTCOME = 'prof_garman_klass_vol'
+DEFAULT_ENDOGENOUS = ['top20_mean', 'top20_std', 'coeff_var']
+DEFAULT_CONTROLS = ['market_return', 'eth_return', 'eth_turnover']
+
+def load_iv_data(data_file='../data/processed/daily_regression_data.csv'):
+    """
+    Daily regression data with the Treasury Bill rate merged in
+    (forward-filled) and coeff_var = top20_std / top20_mean, as in 2SLS.ipynb.
+    """
+    df = pd.read_csv(data_file)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.merge(treasury_rate(df['date'].min(), df['date'].max()), on='date', how='left')
+    df['interest_rate'] = df['interest_rate'].ffill()
+    df['coeff_var'] = df['top20_std'] / df['top20_mean']
+    return df
+
+def lagged_instruments(df, column='interest_rate', lags=range(1, 91)):
+    """
+    Add `{column}_lag{k}` columns (built in one block) and return the frame
+    with {name: [name]} single-instrument sets
+    """
+    names = feature_names([column], lags=lags)
+    return add_features(df, names), {name: [name] for name in names}
+
+def newey_west_lags(n):
+    """Newey-West rule-of-thumb bandwidth floor(4 (n/100)^(2/9))"""
+    return int(np.floor(4 * (n / 100) ** (2 / 9)))
+
+def _score_covariance(scores, cov_type, hac_lags):
+    """
+    Sum over t of s_t s_t' for scores of shape (n, batch, p), plus Bartlett-
+    weighted autocovariances up to `hac_lags` for cov_type='kernel'.
+    Returns (batch, p, p).
+    """
+    S = np.einsum('nbi,nbj->bij', scores, scores)
+    if cov_type == 'kernel':
+        for lag in range(1, hac_lags + 1):
+            gamma = np.einsum('nbi,nbj->bij', scores[lag:], scores[:-lag])
+            S += (1 - lag / (hac_lags + 1)) * (gamma + np.swapaxes(gamma, -1, -2))
+    return S
+
+def _fit_group(y, E, Z, W, cov_type, hac_lags):
+    """
+    2SLS of y on each column of E (one endogenous regressor at a time) with
+    instruments Z and exogenous regressors W, for all columns at once.
+
+    The exogenous block is projected out of y, E and Z with one QR of W
+    (Frisch-Waugh-Lovell), so each regression reduces to the partialled
+    endogenous variable and its projection on the partialled instruments.
+    """
+    n, m = len(y), Z.shape[1]
+    Q_w, _ = np.linalg.qr(W)
+    partialled = np.column_stack([y, E, Z])
+    partialled = partialled - Q_w @ (Q_w.T @ partialled)
+    y_t, E_t, Z_t = partialled[:, 0], partialled[:, 1:1 + E.shape[1]], partialled[:, 1 + E.shape[1]:]
+
+    # First stage for every endogenous column from one QR of the instruments
+    Q_z, R_z = np.linalg.qr(Z_t)
+    projection = Q_z.T @ E_t
+    fitted = Q_z @ projection
+    first_resid = E_t - fitted
+    first_rss = (first_resid ** 2).sum(axis=0)
+    explained = (projection ** 2).sum(axis=0)
+    df_first = n - W.shape[1] - m
+    first_f = explained / m / (first_rss / df_first)
+    partial_r2 = explained / (E_t ** 2).sum(axis=0)
+
+    # Second stage: b = xhat'y / xhat'x, structural residuals use the actual regressor
+    xhat_x = (fitted * E_t).sum(axis=0)
+    coef = fitted.T @ y_t / xhat_x
+    resid = y_t[:, None] - E_t * coef
+    ols_coef = E_t.T @ y_t / (E_t ** 2).sum(axis=0)
+
+    if cov_type == 'unadjusted':
+        variance = (resid ** 2).mean(axis=0) / (fitted ** 2).sum(axis=0)
+        first_f_robust = first_f
+    else:
+        meat = _score_covariance((fitted * resid)[:, :, None], cov_type, hac_lags)[:, 0, 0]
+        variance = meat / (fitted ** 2).sum(axis=0) ** 2
+
+        # Robust first-stage Wald / m: pi' V^-1 pi with V = R^-1 Q' S Q R^-T
+        pi = np.linalg.solve(R_z, projection)
+        scores = Q_z[:, None, :] * first_resid[:, :, None]
+        R_inv = np.linalg.inv(R_z)
+        V = R_inv @ _score_covariance(scores, cov_type, hac_lags) @ R_inv.T
+        first_f_robust = np.einsum('ib,bij,jb->b', pi, np.linalg.inv(V), pi) / m
+
+    se = np.sqrt(variance)
+    return {
+        'coef': coef,
+        'se': se,
+        't': coef / se,
+        'p_value': 2 * stats.norm.sf(np.abs(coef / se)),
+        'ols_coef': ols_coef,
+        'first_stage_f': first_f,
+        'first_stage_f_p': stats.f.sf(first_f, m, df_first),
+        'first_stage_f_robust': first_f_robust,
+        'partial_r2': partial_r2,
+    }
+
+def _fit_instrument_set(df, outcome, endogenous, name, instruments, controls, cov_type, hac_lags):
+    """All endogenous regressors for one instrument set, grouped by sample"""
+    base = df[[outcome] + list(instruments) + list(controls)].notna().all(axis=1).to_numpy()
+    valid = {endog: base & df[endog].notna().to_numpy() for endog in endogenous}
+
+    # Endogenous regressors with the same sample share every projection
+    groups = {}
+    for endog in endogenous:
+        groups.setdefault(valid[endog].tobytes(), []).append(endog)
+
+    rows = []
+    for group in groups.values():
+        mask = valid[group[0]]
+        n = int(mask.sum())
+        if n <= len(instruments) + len(controls) + 2:
+            print(f"⚠️  Skipping {name} for {group}: only {n} observations")
+            continue
+        lags = hac_lags if hac_lags is not None else newey_west_lags(n)
+        W = np.column_stack([np.ones(n)] + [df[control].to_numpy(dtype=np.float64)[mask] for control in controls])
+        fit = _fit_group(df[outcome].to_numpy(dtype=np.float64)[mask],
+                         df[group].to_numpy(dtype=np.float64)[mask],
+                         df[list(instruments)].to_numpy(dtype=np.float64)[mask],
+                         W, cov_type, lags)
+        for i, endog in enumerate(group):
+            row = {
+                'outcome': outcome,
+                'endogenous': endog,
+                'instruments': name,
+                'n_instruments': len(instruments),
+                'nobs': n,
+                'cov_type': cov_type,
+                'hac_lags': lags if cov_type == 'kernel' else np.nan,
+            }
+            row.update({key: values[i] for key, values in fit.items()})
+            rows.append(row)
+    return rows
+
+def iv_grid(df, instrument_sets, endogenous=DEFAULT_ENDOGENOUS, outcome=DEFAULT_OUTCOME, controls=DEFAULT_CONTROLS,
+            cov_type='kernel', hac_lags=None, max_workers=None):
+    """
+    Fit 2SLS for every endogenous regressor x instrument set in one call.
+
+    Each model is outcome ~ const + endogenous + controls, with the controls
+    also used as instruments (a proper first stage, unlike the notebook's
+    instrument-only manual first stage). Standard errors use the structural
+    residuals; `cov_type` is 'unadjusted', 'robust' or 'kernel' (Bartlett HAC
+    with `hac_lags`, default Newey-West), without small-sample corrections
+    as in linearmodels' IV2SLS. `instrument_sets` maps a name to a list of
+    instrument columns (see lagged_instruments). Instrument sets run in
+    parallel threads.
+
+    Returns one table with the second-stage coefficient, se / t / p-value,
+    the OLS coefficient for comparison and first-stage diagnostics
+    (homoskedastic and robust F for the excluded instruments, partial R^2).
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda item: _fit_instrument_set(df, outcome, endogenous, item[0], item[1], controls, cov_type, hac_lags),
+            instrument_sets.items()
+        )
+        rows = [row for set_rows in results for row in set_rows]
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    import time
+
+    print("=== 2SLS Instrument Lag Grid ===")
+    df = load_iv_data()
+    df, instrument_sets = lagged_instruments(df, 'interest_rate', range(1, 91))
+
+    start_time = time.time()
+    results = iv_grid(df, instrument_sets)
+    print(f"✅ {len(results)} 2SLS models in {time.time() - start_time:.2f}s")
+
+    os.makedirs('../results', exist_ok=True)
+    results.to_csv('../results/iv_grid.csv', index=False)
+    print("Results saved as '../results/iv_grid.csv'")
+
+    print("\nNotebook instrument (interest_rate_lag30):")
+    columns = ['endogenous', 'coef', 'se', 'p_value', 'ols_coef', 'first_stage_f', 'first_stage_f_robust', 'nobs']
+    print(results[results['instruments'] == 'interest_rate_lag30'][columns].to_string(index=False))
@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_DIR = '../data/raw/market_cache'
+
+def yahoo_fetcher(ticker, start, end, interval='1d'):
+    """Download [start, end) from Yahoo Finance with flat OHLCV columns"""
+    import yfinance as yf
+
+    data = yf.download(ticker, start=start, end=end, interval=interval, progress=False)
+    if isinstance(data.columns, pd.MultiIndex):
+        # Recent yfinance versions return (Price, Ticker) columns even for one ticker
+        data.columns = data.columns.get_level_values(0)
+    return data
+
+def _merge_ranges(ranges):
+    """Merge overlapping or touching [start, end) ranges"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def _missing_ranges(covered, start, end):
+    """Parts of [start, end) not covered by the (merged) `covered` ranges"""
+    missing = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+class MarketDataCache:
+    """
+    Local OHLCV cache keyed by (ticker, interval).
+
+    Every series is stored as one Parquet file next to a JSON sidecar listing
+    the [start, end) ranges already fetched, so days without bars (weekends,
+    holidays) are not requested again. `get` fetches only the uncovered parts
+    of the requested range and merges them into the stored series.
+
+    `fetcher(ticker, start, end, interval)` returns a DataFrame indexed by
+    bar timestamp (default: Yahoo Finance). With `offline=True` nothing is
+    fetched and requests are served from whatever is cached.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, fetcher=yahoo_fetcher, offline=False):
+        self.cache_dir = cache_dir
+        self.fetcher = fetcher
+        self.offline = offline
+
+    def _paths(self, ticker, interval):
+        name = re.sub(r'[^A-Za-z0-9._-]', '_', f'{ticker}_{interval}')
+        base = os.path.join(self.cache_dir, name)
+        return base + '.parquet', base + '.json'
+
+    def load(self, ticker, interval='1d'):
+        """Return (cached data, covered ranges) for a series"""
+        data_file, ranges_file = self._paths(ticker, interval)
+        if not os.path.exists(data_file) or not os.path.exists(ranges_file):
+            return pd.DataFrame(), []
+        with open(ranges_file, 'r') as file:
+            ranges = [[pd.Timestamp(start), pd.Timestamp(end)] for start, end in json.load(file)['ranges']]
+        return pd.read_parquet(data_file), ranges
+
+    def save(self, ticker, interval, data, ranges):
+        """Write the series and its covered ranges (each file replaced atomically)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_file, ranges_file = self._paths(ticker, interval)
+
+        data.to_parquet(data_file + '.tmp')
+        os.replace(data_file + '.tmp', data_file)
+        with open(ranges_file + '.tmp', 'w') as file:
+            json.dump({
+                'ticker': ticker,
+                'interval': interval,
+                'ranges': [[str(start), str(end)] for start, end in ranges],
+            }, file, indent=2)
+        os.replace(ranges_file + '.tmp', ranges_file)
+
+    def get(self, ticker, start, end=None, interval='1d'):
+        """
+        Bars of `ticker` in [start, end) (end defaults to now), fetching the
+        missing ranges first unless offline.
+
+        Only ranges that have ended before today are recorded as covered, so
+        the current (still changing) bar is refreshed on the next call.
+        """
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+        data, ranges = self.load(ticker, interval)
+
+        missing = _missing_ranges(ranges, start, end)
+        if missing and self.offline:
+            print(f"⚠️  Offline: {ticker} ({interval}) not cached for "
+                  + ", ".join(f"{a.date()} to {b.date()}" for a, b in missing))
+        elif missing:
+            today = pd.Timestamp.now().normalize()
+            fetched = [data]
+            for fetch_start, fetch_end in missing:
+                print(f"Fetching {ticker} ({interval}) {fetch_start.date()} to {fetch_end.date()}")
+                new_data = self.fetcher(ticker, fetch_start, fetch_end, interval)
+                if new_data is not None and len(new_data):
+                    new_data = new_data.copy()
+                    new_data.index = pd.DatetimeIndex(new_data.index)
+                    if new_data.index.tz is not None:
+                        new_data.index = new_data.index.tz_convert('UTC').tz_localize(None)
+                    fetched.append(new_data)
+                if fetch_start < today:
+                    ranges.append([fetch_start, min(fetch_end, today)])
+
+            fetched = [frame for frame in fetched if len(frame)]
+            if fetched:
+                data = pd.concat(fetched)
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+            else:
+                data = pd.DataFrame(index=pd.DatetimeIndex([]))
+            data.index.name = 'Date'
+            self.save(ticker, interval, data, _merge_ranges(ranges))
+
+        if len(data) == 0:
+            return data
+        return data[(data.index >= start) & (data.index < end)]
+
+def download(ticker, start, end=None, interval='1d', cache_dir=CACHE_DIR, offline=None, fetcher=None):
+    """
+    Cached drop-in for yf.download(ticker, start=..., end=..., interval=...)
+    with flat OHLCV columns. `offline` defaults to the MARKET_DATA_OFFLINE
+    environment variable.
+    """
+    if offline is None:
+        offline = os.getenv('MARKET_DATA_OFFLINE', '').lower() in ('1', 'true', 'yes')
+    cache = MarketDataCache(cache_dir, fetcher=fetcher or yahoo_fetcher, offline=offline)
+    return cache.get(ticker, start, end, interval)
+
+def treasury_rate(start, end=None, cache_dir=CACHE_DIR, offline=None):
+    """13-week Treasury Bill yield (^IRX Close, in %) as a date / interest_rate frame"""
+    treasury_data = download('^IRX', start=start, end=end, cache_dir=cache_dir, offline=offline)
+    treasury_data = treasury_data[['Close']].copy()
+    treasury_data.columns = ['interest_rate']
+    treasury_data.index.name = 'date'
+    return treasury_data.reset_index()
+
+if __name__ == "__main__":
+    import sys
+
+    print("=== Market Data Cache ===")
+    cache = MarketDataCache(offline="--offline" in sys.argv)
+
+    # Warm the cache with the series the notebooks and scripts use
+    missing = []
+    for ticker, start in [('ETH-USD', '2018-12-31'), ('^IRX', '2018-12-31')]:
+        data = cache.get(ticker, start)
+        if len(data):
+            print(f"✅ {ticker}: {len(data):,} bars, {data.index.min().date()} to {data.index.max().date()}")
+        else:
+            print(f"❌ {ticker}: no data")
+            missing.append(ticker)
+
+    # Non-zero exit so the pipeline runner records the stage as failed
+    if missing:
+        exit(1)
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from instrumentation import StageTimer
+
+# Registered concentration metrics: name -> function(ctx)
+METRICS = {}
+
+def register_metric(name):
+    """
+    Register a concentration metric.
+
+    The function receives a SortedShares context and returns either one array
+    (one value per period, stored in column `name`) or a dict of
+    {column: array} for metrics that produce several columns.
+    """
+    def decorator(func):
+        METRICS[name] = func
+        return func
+    return decorator
+
+def count_matrix(counts, period_col='date', recipient_col='Fee Recipient Nametag'):
+    """
+    Build a sparse periods x recipients block-count matrix from the long
+    counts produced by aggregation.count_blocks_by_period.
+
+    Returns (matrix, totals, periods, recipients). `totals` counts every block
+    of the period, including blocks without a recipient, so shares keep the
+    same denominator as the miner_rank_* columns.
+    """
+    period_codes, periods = pd.factorize(counts[period_col], sort=True)
+    blocks = counts['blocks'].to_numpy(dtype=np.float64)
+    totals = np.bincount(period_codes, weights=blocks, minlength=len(periods))
+
+    named = counts[recipient_col].notna().to_numpy()
+    recipient_codes, recipients = pd.factorize(counts[recipient_col][named])
+    matrix = sparse.csr_matrix(
+        (blocks[named], (period_codes[named], recipient_codes)),
+        shape=(len(periods), len(recipients))
+    )
+    return matrix, totals, periods, recipients
+
+class SortedShares:
+    """
+    Per-period shares sorted in descending order, computed once and shared by
+    all metrics. Entries are flat arrays in period order:
+    - row: period index of each entry
+    - rank: 0 for the largest recipient of the period, 1 for the next, ...
+    - share: fraction of the period's blocks (0-1)
+    - cum_share: cumulative share within the period up to and including the entry
+    """
+
+    def __init__(self, matrix, totals=None, top_k=(1, 3, 5, 10, 20)):
+        matrix = sparse.csr_matrix(matrix)
+        matrix.eliminate_zeros()
+        self.n_rows = matrix.shape[0]
+        self.top_k = tuple(top_k)
+
+        counts = np.asarray(matrix.data, dtype=np.float64)
+        row_sizes = np.diff(matrix.indptr)
+        row = np.repeat(np.arange(self.n_rows), row_sizes)
+
+        if totals is None:
+            totals = np.bincount(row, weights=counts, minlength=self.n_rows)
+        self.totals = np.asarray(totals, dtype=np.float64)
+
+        # Sort each row descending with one global sort on a (row, -count) key
+        max_count = counts.max() if len(counts) else 0.0
+        order = np.argsort(row * (max_count + 1.0) + (max_count - counts))
+        self.row = row[order]
+        self.counts = counts[order]
+        self.rank = np.arange(len(order)) - np.repeat(matrix.indptr[:-1], row_sizes)
+        self.n_active = row_sizes
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.share = self.counts / self.totals[self.row]
+        cum = np.cumsum(self.share)
+        row_offset = np.r_[0.0, cum][matrix.indptr[:-1]]
+        self.cum_share = cum - np.repeat(row_offset, row_sizes)
+
+    def row_sum(self, values):
+        """Sum per-entry values within each period"""
+        return np.bincount(self.row, weights=values, minlength=self.n_rows)
+
+@register_metric('top_k')
+def top_k_metrics(ctx):
+    """Top-K share (sum, %), mean and std over the K largest recipients (0-padded)"""
+    columns = {}
+    head = ctx.rank < max(ctx.top_k)
+    row = ctx.row[head]
+    rank = ctx.rank[head]
+    percent = ctx.share[head] * 100
+    for k in ctx.top_k:
+        in_top = rank < k
+        total = np.bincount(row[in_top], weights=percent[in_top], minlength=ctx.n_rows)
+        squares = np.bincount(row[in_top], weights=percent[in_top] ** 2, minlength=ctx.n_rows)
+        mean = total / k
+        columns[f'top{k}_centrality'] = total
+        columns[f'top{k}_mean'] = mean
+        if k > 1:
+            columns[f'top{k}_std'] = np.sqrt(np.maximum(squares - k * mean ** 2, 0) / (k - 1))
+    return columns
+
+@register_metric('hhi')
+def hhi(ctx):
+    """Herfindahl-Hirschman Index over the full distribution (0-10000 scale)"""
+    return ctx.row_sum(ctx.share ** 2) * 10000
+
+@register_metric('gini')
+def gini(ctx):
+    """Gini coefficient over all active recipients"""
+    n = ctx.n_active[ctx.row]
+    ascending_index = n - ctx.rank
+    weighted = ctx.row_sum(ascending_index * ctx.share)
+    total = ctx.row_sum(ctx.share)
+    n = ctx.n_active
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = 2 * weighted / (n * total) - (n + 1) / n
+    return np.where(n > 0, value, 0.0)
+
+@register_metric('entropy')
+def entropy(ctx):
+    """Shannon entropy of the share distribution (nats)"""
+    share = ctx.share[ctx.share > 0]
+    row = ctx.row[ctx.share > 0]
+    return -np.bincount(row, weights=share * np.log(share), minlength=ctx.n_rows)
+
+@register_metric('nakamoto')
+def nakamoto(ctx):
+    """Smallest number of recipients that together produced more than 50% of blocks"""
+    needed = (ctx.cum_share - ctx.share) <= 0.5
+    value = ctx.row_sum(needed.astype(np.float64))
+    reaches_majority = ctx.row_sum(ctx.share) > 0.5
+    return np.where(reaches_majority, value, np.nan)
+
+def compute_metrics(matrix, totals=None, metrics=None, top_k=(1, 3, 5, 10, 20), index=None):
+    """
+    Compute concentration metrics for every row (period) of a periods x
+    recipients count matrix in one vectorized pass.
+
+    `metrics` selects registered metrics by name (default: all). Returns a
+    DataFrame with one row per period, indexed by `index` if given.
+    """
+    ctx = SortedShares(matrix, totals, top_k=top_k)
+
+    columns = {}
+    for name in (metrics or METRICS):
+        values = METRICS[name](ctx)
+        if isinstance(values, dict):
+            columns.update(values)
+        else:
+            columns[name] = values
+
+    return pd.DataFrame(columns, index=index)
+
+def period_metrics(counts, period_col='date', recipient_col='Fee Recipient Nametag', **kwargs):
+    """Compute metrics straight from long per-period counts"""
+    with StageTimer('metrics', rows=len(counts)) as stage:
+        matrix, totals, periods, _ = count_matrix(counts, period_col, recipient_col)
+        result = compute_metrics(matrix, totals, **kwargs)
+        result.insert(0, period_col, np.asarray(periods))
+        stage.count('periods', len(result))
+    return result
@@ -0,0 +1,381 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = '../data/processed/pipeline_state.json'
+LOG_DIR = '../results/pipeline_logs'
+
+# Stages of the data flow. Paths are relative to scripts/. A stage runs a
+# script (with `args`, from `cwd`), executes a notebook, or calls `function`
+# with `args`; it depends on every stage producing one of its inputs. A stage
+# that leaves an existing output untouched has failed, unless it is marked
+# `idempotent` (allowed to find its outputs already up to date).
+STAGES = {
+    'clean_blocks': {
+        'notebook': '../notebooks/ETH_analysis.ipynb',
+        'inputs': ['../notebooks/ETH Block Data', '../notebooks/ethereum.xlsx', '../notebooks/crypto_market.xlsx'],
+        'outputs': ['../notebooks/ETH_Block_Data_Cleaned.csv', '../data/processed/eth_regression_data.csv'],
+    },
+    'publish_cleaned_blocks': {
+        'function': shutil.copyfile,
+        'args': ['../notebooks/ETH_Block_Data_Cleaned.csv', '../data/raw/ETH_Block_Data_Cleaned.csv'],
+        'inputs': ['../notebooks/ETH_Block_Data_Cleaned.csv'],
+        'outputs': ['../data/raw/ETH_Block_Data_Cleaned.csv'],
+    },
+    'preprocess': {
+        'script': 'preprocess.py',
+        'args': ['--stream'],
+        'cwd': '../data/raw',
+        'inputs': ['../data/raw/ETH_Block_Data_Cleaned.csv'],
+        'outputs': ['../data/raw/ETH_Block_Data_Processed.csv', '../data/raw/ETH_Block_Store'],
+    },
+    'recipient_dictionary': {
+        'script': 'recipients.py',
+        'inputs': ['../data/raw/ETH_Block_Store'],
+        'outputs': ['../data/processed/recipient_dictionary.parquet', '../data/processed/recipient_entities.csv'],
+    },
+    'market_data': {
+        'script': 'market_data.py',
+        'inputs': [],
+        'outputs': ['../data/raw/market_cache'],
+        # A warm cache is left as it is
+        'idempotent': True,
+    },
+    'daily_regression': {
+        'notebook': '../notebooks/ETH_daily_analysis.ipynb',
+        'inputs': ['../data/raw/ethereum.xlsx', '../data/raw/crypto_market.xlsx',
+                   '../data/raw/ETH_Block_Data_Cleaned.csv', '../data/raw/ETH_Block_Store', '../data/raw/market_cache'],
+        'outputs': ['../data/processed/daily_regression_data.csv'],
+    },
+    'event_study': {
+        'script': 'event_study.py',
+        'inputs': ['../data/processed/daily_regression_data.csv'],
+        'outputs': ['../results/event_study_grid.csv'],
+    },
+    'placebo_inference': {
+        'script': 'placebo_inference.py',
+        'inputs': ['../data/processed/daily_regression_data.csv'],
+        'outputs': ['../results/event_study_placebo.csv'],
+    },
+    'granger_sweep': {
+        'script': 'granger_sweep.py',
+        'inputs': ['../data/processed/daily_regression_data.csv', '../data/processed/eth_regression_data.csv'],
+        'outputs': ['../results/granger_var_sweep.csv'],
+    },
+    'var_irf': {
+        'script': 'var_irf.py',
+        'inputs': ['../data/processed/daily_regression_data.csv'],
+        'outputs': ['../results/var_irf_bands.csv'],
+    },
+    'iv_grid': {
+        'script': 'iv_regression.py',
+        'inputs': ['../data/processed/daily_regression_data.csv', '../data/raw/market_cache'],
+        'outputs': ['../results/iv_grid.csv'],
+    },
+    'sharpe_sweep': {
+        'script': 'sharpe_sweep.py',
+        'inputs': ['../data/processed/daily_regression_data.csv', '../data/raw/market_cache'],
+        'outputs': ['../results/sharpe_sweep.csv'],
+    },
+    'rolling_regression': {
+        'script': 'rolling_regression.py',
+        'inputs': ['../data/processed/daily_regression_data.csv'],
+        'outputs': ['../results/rolling_coefficients.csv'],
+    },
+}
+
+IMPORT_PATTERN = re.compile(r'^\s*(?:from|import)\s+([A-Za-z_]\w*)', re.MULTILINE)
+
+def _sha256(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+    return digest.hexdigest()
+
+class Fingerprints:
+    """
+    Content hashes of files and directories. File digests are memoized by
+    (size, mtime) in the pipeline state, so unchanged multi-GB inputs are
+    not re-read on every run.
+    """
+
+    def __init__(self, memo=None):
+        self.memo = memo if memo is not None else {}
+        self.lock = threading.Lock()
+
+    def file(self, path):
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self.lock:
+            cached = self.memo.get(key)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['digest']
+
+        with open(path, 'rb') as file:
+            digest = _sha256(iter(lambda: file.read(1 << 20), b''))
+        with self.lock:
+            self.memo[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+        return digest
+
+    def snapshot(self):
+        """Copy of the memo, safe to serialize while other threads keep hashing"""
+        with self.lock:
+            return dict(self.memo)
+
+    def path(self, path):
+        """Digest of a file, of a directory's files (names and contents), or None if missing"""
+        if os.path.isfile(path):
+            return self.file(path)
+        if not os.path.isdir(path):
+            return None
+        entries = []
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                entries.append(f'{os.path.relpath(file_path, path)}:{self.file(file_path)}\n')
+        return _sha256(entries)
+
+def _modified(path):
+    """Newest mtime (ns) of a file or of a directory and everything in it, None if missing"""
+    if not os.path.exists(path):
+        return None
+    newest = os.stat(path).st_mtime_ns
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            newest = max(newest, os.stat(os.path.join(root, name)).st_mtime_ns)
+    return newest
+
+def _notebook_code(path):
+    """Source of a notebook's code cells (outputs and metadata do not change results)"""
+    with open(path, 'r') as file:
+        cells = json.load(file)['cells']
+    return '\n'.join(''.join(cell['source']) for cell in cells if cell['cell_type'] == 'code')
+
+def code_fingerprint(stage, fingerprints):
+    """Hash of the stage's code: the script or notebook plus every scripts/ module it imports (transitively)"""
+    if 'function' in stage:
+        function = stage['function']
+        return _sha256([f"{function.__module__}.{function.__qualname__}"])
+    if 'notebook' in stage:
+        sources = [_notebook_code(stage['notebook'])]
+    else:
+        with open(stage['script'], 'r') as file:
+            sources = [file.read()]
+
+    seen = set()
+    pending = list(sources)
+    while pending:
+        for module in IMPORT_PATTERN.findall(pending.pop()):
+            module_file = os.path.join(SCRIPTS_DIR, f'{module}.py')
+            if module not in seen and os.path.exists(module_file):
+                seen.add(module)
+                with open(module_file, 'r') as file:
+                    pending.append(file.read())
+    return _sha256(sources + [f'{module}:{fingerprints.file(os.path.join(SCRIPTS_DIR, module + ".py"))}'
+                              for module in sorted(seen)])
+
+def stage_dependencies(stages):
+    """{stage: set of stages producing one of its inputs (or a directory containing it)}"""
+    producers = {os.path.normpath(output): name for name, stage in stages.items() for output in stage['outputs']}
+    dependencies = {}
+    for name, stage in stages.items():
+        dependencies[name] = set()
+        for path in map(os.path.normpath, stage['inputs']):
+            for output, producer in producers.items():
+                if producer != name and (path == output or path.startswith(output + os.sep)):
+                    dependencies[name].add(producer)
+    return dependencies
+
+def _upstream(targets, dependencies):
+    """The targets and every stage they depend on"""
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(dependencies[name])
+    return selected
+
+def load_pipeline_state(state_file=STATE_FILE):
+    if os.path.exists(state_file):
+        with open(state_file, 'r') as file:
+            return json.load(file)
+    return {'stages': {}, 'files': {}}
+
+def save_pipeline_state(state, state_file=STATE_FILE):
+    """Write the state atomically"""
+    os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+    with open(state_file + '.tmp', 'w') as file:
+        json.dump(state, file, indent=2, sort_keys=True)
+    os.replace(state_file + '.tmp', state_file)
+
+def execute_stage(name, stage, log_dir=LOG_DIR):
+    """Run one stage, writing script / notebook output to {log_dir}/{name}.log"""
+    if 'function' in stage:
+        stage['function'](*stage.get('args', []), **stage.get('kwargs', {}))
+        return
+
+    if 'notebook' in stage:
+        executed_dir = os.path.abspath(os.path.join(log_dir, 'executed'))
+        os.makedirs(executed_dir, exist_ok=True)
+        # Execute a copy so the notebook's own outputs (and fingerprint) stay as they are
+        command = [sys.executable, '-m', 'jupyter', 'nbconvert', '--to', 'notebook', '--execute',
+                   os.path.basename(stage['notebook']), '--output-dir', executed_dir]
+        cwd = os.path.dirname(stage['notebook'])
+    else:
+        command = [sys.executable, os.path.abspath(stage['script'])] + list(stage.get('args', []))
+        cwd = stage.get('cwd', '.')
+
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, f'{name}.log'), 'w') as log:
+        result = subprocess.run(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"exited with code {result.returncode} (see {log_dir}/{name}.log)")
+
+def run_pipeline(targets=None, stages=STAGES, force=(), dry_run=False, max_workers=None,
+                 state_file=STATE_FILE, log_dir=LOG_DIR):
+    """
+    Run the stages needed for `targets` (default: all), skipping every stage
+    whose code, parameters and input contents match its last successful run
+    and whose outputs are unchanged since. Stages whose dependencies are
+    done run concurrently in threads (stages are subprocesses), so
+    independent branches such as market data and block preprocessing
+    overlap. A stage fails on an exception or non-zero exit, a missing
+    output, or an existing output it did not rewrite (unless `idempotent`);
+    a failed stage blocks only its dependents. Stages in `force` always run.
+
+    Returns {stage: 'ran' | 'skipped' | 'failed' | 'blocked' | 'would run'}.
+    """
+    dependencies = stage_dependencies(stages)
+    unknown = [name for name in list(targets or []) + list(force) if name not in stages]
+    if unknown:
+        raise KeyError(f"Unknown stages: {unknown} (available: {list(stages)})")
+    selected = _upstream(targets or list(stages), dependencies)
+
+    state = load_pipeline_state(state_file)
+    fingerprints = Fingerprints(state.setdefault('files', {}))
+    state_lock = threading.Lock()
+    status = {}
+
+    def save_state():
+        """Save under state_lock; the file memo is snapshotted as other stages may still be adding to it"""
+        save_pipeline_state(dict(state, files=fingerprints.snapshot()), state_file)
+
+    def fingerprint(name):
+        stage = stages[name]
+        return _sha256([json.dumps({
+            'code': code_fingerprint(stage, fingerprints),
+            'args': [str(arg) for arg in stage.get('args', [])],
+            'kwargs': {key: str(value) for key, value in stage.get('kwargs', {}).items()},
+            'cwd': stage.get('cwd', '.'),
+            'inputs': {path: fingerprints.path(path) for path in stage['inputs']},
+        }, sort_keys=True)])
+
+    def up_to_date(name, key):
+        previous = state['stages'].get(name)
+        if name in force or previous is None or previous['fingerprint'] != key:
+            return False
+        return all(fingerprints.path(path) == digest for path, digest in previous['outputs'].items())
+
+    def process(name):
+        """Skip or run one stage; returns its status"""
+        if any(status[dependency] in ('failed', 'blocked') for dependency in dependencies[name]):
+            return 'blocked'
+        if dry_run and any(status[dependency] == 'would run' for dependency in dependencies[name]):
+            return 'would run'
+        start_time = time.time()
+        try:
+            key = fingerprint(name)
+            if up_to_date(name, key):
+                return 'skipped'
+            if dry_run:
+                return 'would run'
+            print(f"▶️  {name} started")
+            start_time = time.time()
+            modified = {path: _modified(path) for path in stages[name]['outputs']}
+            execute_stage(name, stages[name], log_dir)
+        except Exception as e:
+            print(f"❌ {name} failed after {time.time() - start_time:.1f}s: {e}")
+            return 'failed'
+
+        missing = [path for path in stages[name]['outputs'] if fingerprints.path(path) is None]
+        if missing:
+            print(f"❌ {name} did not produce {missing}")
+            return 'failed'
+        # Scripts that report failure without a non-zero exit leave the previous run's outputs behind
+        stale = [path for path in stages[name]['outputs'] if modified[path] == _modified(path)]
+        if stale and not stages[name].get('idempotent'):
+            print(f"❌ {name} did not rewrite {stale}")
+            return 'failed'
+        with state_lock:
+            state['stages'][name] = {
+                'fingerprint': key,
+                'outputs': {path: fingerprints.path(path) for path in stages[name]['outputs']},
+                'seconds': round(time.time() - start_time, 3),
+                'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            save_state()
+        print(f"✅ {name} finished in {time.time() - start_time:.1f}s")
+        return 'ran'
+
+    pending = set(selected)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [name for name in stages if name in pending and dependencies[name].issubset(status)]
+            for name in ready:
+                pending.discard(name)
+                running[executor.submit(process, name)] = name
+            if not running:
+                raise RuntimeError(f"Dependency cycle among stages: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                status[running.pop(future)] = future.result()
+
+    with state_lock:
+        if not dry_run:
+            save_state()
+    return {name: status[name] for name in stages if name in status}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the data pipeline, skipping stages whose inputs are unchanged")
+    parser.add_argument('stages', nargs='*', help="Stages to bring up to date with their dependencies (default: all)")
+    parser.add_argument('--force', nargs='*', default=[], metavar='STAGE',
+                        help="Re-run these stages even if unchanged (no names: every selected stage)")
+    parser.add_argument('--dry-run', action='store_true', help="Only report which stages would run")
+    parser.add_argument('--list', action='store_true', help="List stages and their dependencies")
+    parser.add_argument('--jobs', type=int, default=None, help="Maximum concurrent stages")
+    args = parser.parse_args()
+
+    # Stage paths are relative to scripts/
+    os.chdir(SCRIPTS_DIR)
+
+    if args.list:
+        for name, dependencies in stage_dependencies(STAGES).items():
+            print(f"{name:<24} <- {', '.join(sorted(dependencies)) or '-'}")
+        sys.exit(0)
+
+    print("=== Pipeline ===")
+    force = args.force
+    if '--force' in sys.argv and not force:
+        force = list(_upstream(args.stages or list(STAGES), stage_dependencies(STAGES)))
+
+    start_time = time.time()
+    status = run_pipeline(args.stages, force=force, dry_run=args.dry_run, max_workers=args.jobs)
+    print(f"\n{'Stage':<24} Status")
+    for name, result in status.items():
+        print(f"{name:<24} {result}")
+    print(f"\n🎉 Pipeline finished in {time.time() - start_time:.1f}s" if 'failed' not in status.values()
+          else f"\n❌ Pipeline finished with failures in {time.time() - start_time:.1f}s")
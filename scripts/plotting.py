@@ -0,0 +1,203 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import matplotlib
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.collections import PolyCollection
+
+def _to_x(index):
+    """Numeric x positions (matplotlib date numbers for datetime indexes)"""
+    if isinstance(index, pd.DatetimeIndex) or np.issubdtype(np.asarray(index).dtype, np.datetime64):
+        return mdates.date2num(pd.DatetimeIndex(index).to_pydatetime())
+    return np.asarray(index, dtype=np.float64)
+
+def mask_to_spans(index, mask):
+    """
+    Collapse a boolean mask over `index` into contiguous (start, end) spans.
+
+    A span runs from its first True point to the point after its last True
+    point (or the last point of the index), so a run of days shades whole days.
+    """
+    x = _to_x(index)
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return []
+
+    edges = np.diff(np.r_[0, mask.astype(np.int8), 0])
+    starts = np.flatnonzero(edges == 1)
+    ends = np.minimum(np.flatnonzero(edges == -1), len(x) - 1)
+    return list(zip(x[starts], x[ends]))
+
+def shade_spans(ax, index, mask, **kwargs):
+    """
+    Shade the spans of `mask` over the full axis height as one collection,
+    instead of a fill_between polygon with a vertex per day.
+    """
+    spans = mask_to_spans(index, mask)
+    polygons = [[(start, 0), (start, 1), (end, 1), (end, 0)] for start, end in spans]
+    kwargs.setdefault('linewidth', 0)
+    collection = PolyCollection(polygons, transform=ax.get_xaxis_transform(), **kwargs)
+    ax.add_collection(collection)
+    return collection
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling of a finite series to
+    `n_out` points, keeping the first and last point and the visually
+    dominant point of every bucket. Returns the selected indices.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+def downsample(index, values, max_points=2000):
+    """
+    Downsample a line with LTTB for plotting. NaN breaks are preserved: each
+    finite run gets a share of `max_points` proportional to its length.
+    Returns (x, y) with x in matplotlib units.
+    """
+    x = _to_x(index)
+    y = np.asarray(values, dtype=np.float64)
+    if len(y) <= max_points:
+        return x, y
+
+    finite = np.isfinite(y)
+    edges = np.diff(np.r_[0, finite.astype(np.int8), 0])
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    xs, ys = [], []
+    for start, end in zip(starts, ends):
+        n_out = max(int(max_points * (end - start) / finite.sum()), 3)
+        keep = start + lttb(x[start:end], y[start:end], n_out)
+        xs.extend([x[keep], [x[end - 1]]])
+        ys.extend([y[keep], [np.nan]])
+    return np.concatenate(xs), np.concatenate(ys)
+
+def plot_line(ax, index, values, max_points=2000, **kwargs):
+    """ax.plot with LTTB downsampling of long series"""
+    x, y = downsample(index, values, max_points)
+    lines = ax.plot(x, y, **kwargs)
+    if isinstance(index, pd.DatetimeIndex):
+        ax.xaxis_date()
+    return lines
+
+def sharpe_regime_figure(df, metric='top20_mean', window=30, q_low=0.25, q_high=0.75, max_points=2000):
+    """
+    Three-panel comparison from sharpe_comparison.py: rolling Sharpe ratios,
+    the ETH - S&P 500 difference and the centrality metric, with high / low
+    centrality regimes shaded as spans.
+    """
+    high_threshold = df[metric].quantile(q_high)
+    low_threshold = df[metric].quantile(q_low)
+    high = (df[metric] > high_threshold).to_numpy()
+    low = (df[metric] < low_threshold).to_numpy()
+    sharpe_diff = df['eth_sharpe'] - df['sp500_sharpe']
+    high_label = f'High Centrality (top {(1 - q_high) * 100:.0f}%)'
+    low_label = f'Low Centrality (bottom {q_low * 100:.0f}%)'
+
+    fig, axes = plt.subplots(3, 1, figsize=(14, 13), sharex=True)
+
+    # Sharpe Ratio Plot
+    ax1 = axes[0]
+    plot_line(ax1, df.index, df['eth_sharpe'], max_points, label='ETH Sharpe', color='#627EEA', linewidth=1.5)
+    plot_line(ax1, df.index, df['sp500_sharpe'], max_points, label='S&P 500 Sharpe', color='#1f77b4', linewidth=1.5)
+    ax1.axhline(y=0, color='gray', linestyle='--', alpha=0.5)
+    shade_spans(ax1, df.index, high, alpha=0.2, color='red', label=high_label)
+    shade_spans(ax1, df.index, low, alpha=0.2, color='green', label=low_label)
+    ax1.set_ylabel(f'Sharpe Ratio ({window}-day rolling)', fontsize=11)
+    ax1.set_title('ETH vs S&P 500: Sharpe Ratio Comparison by Centrality Periods',
+                  fontsize=13, fontweight='bold')
+    ax1.legend(loc='upper left', fontsize=9)
+    ax1.grid(True, alpha=0.3)
+
+    # Sharpe Difference Plot (ETH - S&P 500)
+    ax2 = axes[1]
+    x, y = downsample(df.index, sharpe_diff, max_points)
+    ax2.plot(x, y, label='ETH - S&P 500 Sharpe Diff', color='black', linewidth=1.5, alpha=0.7)
+    ax2.axhline(y=0, color='gray', linestyle='-', linewidth=2, alpha=0.5)
+    ax2.fill_between(x, y, 0, where=(y > 0), alpha=0.3, color='#627EEA', label='ETH Outperforms', interpolate=True)
+    ax2.fill_between(x, y, 0, where=(y <= 0), alpha=0.3, color='red', label='S&P 500 Outperforms', interpolate=True)
+    shade_spans(ax2, df.index, high, alpha=0.1, color='orange')
+    shade_spans(ax2, df.index, low, alpha=0.1, color='lightgreen')
+    ax2.set_ylabel('Sharpe Difference', fontsize=11)
+    ax2.set_title('ETH vs S&P 500: Sharpe Ratio Difference (Positive = ETH Better)', fontsize=12, fontweight='bold')
+    ax2.legend(loc='upper left', fontsize=9)
+    ax2.grid(True, alpha=0.3)
+
+    # Centrality Plot
+    ax3 = axes[2]
+    plot_line(ax3, df.index, df[metric], max_points, label=f'{metric} Centrality', color='purple', linewidth=1.5)
+    ax3.axhline(y=high_threshold, color='red', linestyle='--', alpha=0.7,
+                label=f'High threshold ({q_high * 100:.0f}th pct): {high_threshold:.2f}')
+    ax3.axhline(y=low_threshold, color='green', linestyle='--', alpha=0.7,
+                label=f'Low threshold ({q_low * 100:.0f}th pct): {low_threshold:.2f}')
+    shade_spans(ax3, df.index, high, alpha=0.15, color='red')
+    shade_spans(ax3, df.index, low, alpha=0.15, color='green')
+    ax3.set_ylabel(f'Centrality ({metric})', fontsize=11)
+    ax3.set_xlabel('Date', fontsize=11)
+    ax3.set_title('Validator Centrality Over Time', fontsize=12, fontweight='bold')
+    ax3.legend(loc='upper left', fontsize=9)
+    ax3.grid(True, alpha=0.3)
+
+    # Format x-axis
+    ax3.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax3.xaxis.set_major_locator(mdates.MonthLocator(interval=6))
+    plt.setp(ax3.get_xticklabels(), rotation=45)
+
+    fig.tight_layout()
+    return fig
+
+def _render(job):
+    """Draw one (draw_func, kwargs, output_file[, savefig_kwargs]) job and save it"""
+    draw_func, kwargs, output_file = job[:3]
+    savefig_kwargs = {'dpi': 300, 'bbox_inches': 'tight'}
+    if len(job) > 3:
+        savefig_kwargs.update(job[3])
+
+    start_time = time.perf_counter()
+    fig = draw_func(**kwargs)
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    fig.savefig(output_file, **savefig_kwargs)
+    plt.close(fig)
+    return output_file, time.perf_counter() - start_time
+
+def render_figures(jobs, max_workers=None):
+    """
+    Render a batch of figures on the Agg backend, in a process pool when
+    there is more than one.
+
+    Each job is (draw_func, kwargs, output_file) or (draw_func, kwargs,
+    output_file, savefig_kwargs), where draw_func is a module-level function
+    returning a Figure (so it can be pickled). Returns [(output_file, seconds)].
+    """
+    jobs = list(jobs)
+    if len(jobs) <= 1 or max_workers == 1:
+        return [_render(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=matplotlib.use, initargs=('Agg',)) as executor:
+        return list(executor.map(_render, jobs))
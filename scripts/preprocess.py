@@ -1,21 +1,35 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import os
+import time
+import shutil
+import sys
 
-def preprocess_eth_blocks_csv(input_file, output_file):
+from aggregation import clean_numeric
+from block_store import write_block_store, load_blocks
+from instrumentation import StageTimer, configure_from_argv, current_stage, instrumented
+
+@instrumented('preprocess', mode='in_memory')
+def preprocess_eth_blocks_csv(input_file, output_file, store_dir=None):
     """
     Preprocess ETH blocks CSV:
     1. Remove duplicates based on Block number
     2. Extract Date from DateTime (UTC) 
     3. Clean and validate data
     4. Save to new file
+    5. Optionally write the typed, month-partitioned Parquet store
     """
     
     print(f"Loading CSV file: {input_file}")
+    stage = current_stage()
     
     try:
         # Load CSV with pandas
-        df = pd.read_csv(input_file)
+        stage.bytes = os.path.getsize(input_file)
+        with StageTimer('preprocess.load', bytes=stage.bytes) as load:
+            df = pd.read_csv(input_file)
+            load.rows = stage.rows = len(df)
         print(f"✅ Loaded {len(df)} rows")
         
         # Show original columns
@@ -37,6 +51,7 @@ def preprocess_eth_blocks_csv(input_file, output_file):
         initial_count = len(df)
         df = df.drop_duplicates(subset=['Block'], keep='first')
         duplicates_removed = initial_count - len(df)
+        stage.count('duplicates_removed', duplicates_removed)
         print(f"✅ Removed {duplicates_removed} duplicate blocks")
         
         # Extract Date from DateTime (UTC)
@@ -57,6 +72,7 @@ def preprocess_eth_blocks_csv(input_file, output_file):
         initial_count = len(df)
         df = df[pd.to_numeric(df['Block'], errors='coerce').notna()]
         invalid_blocks = initial_count - len(df)
+        stage.count('invalid_blocks', invalid_blocks)
         if invalid_blocks > 0:
             print(f"⚠️  Removed {invalid_blocks} rows with invalid block numbers")
         
@@ -70,10 +86,18 @@ def preprocess_eth_blocks_csv(input_file, output_file):
         df = df[['Date', 'Block'] + cols]
         
         # Save processed file
-        df.to_csv(output_file, index=False)
+        with StageTimer('preprocess.write_csv', rows=len(df)):
+            df.to_csv(output_file, index=False)
+        stage.count('rows_written', len(df))
         print(f"✅ Processed file saved: {output_file}")
         print(f"Final record count: {len(df)}")
         
+        # Save columnar store so later stages don't re-parse the CSV
+        if store_dir:
+            with StageTimer('preprocess.write_store', rows=len(df)):
+                write_block_store(df, store_dir)
+            print(f"✅ Block store written: {store_dir}")
+        
         # Show sample of processed data
         print("\nSample of processed data:")
         print(df[['Date', 'Block', 'DateTime (UTC)', 'Fee Recipient']].head())
@@ -84,10 +108,150 @@ def preprocess_eth_blocks_csv(input_file, output_file):
         print(f"❌ Error processing file: {str(e)}")
         return False
 
+class BlockBitmap:
+    """Seen-set over block numbers stored as one bit per block (~3 MB for 25M blocks)"""
+
+    def __init__(self, capacity=1 << 25):
+        self.bits = np.zeros(capacity // 8 + 1, dtype=np.uint8)
+
+    def _grow(self, max_block):
+        needed = int(max_block) // 8 + 1
+        if needed > len(self.bits):
+            grown = np.zeros(max(needed, 2 * len(self.bits)), dtype=np.uint8)
+            grown[:len(self.bits)] = self.bits
+            self.bits = grown
+
+    def add_new(self, blocks):
+        """
+        Mark `blocks` as seen and return a mask of the rows that are first
+        occurrences (not seen in earlier chunks and first within this chunk).
+        """
+        blocks = np.asarray(blocks, dtype=np.int64)
+        keep = np.zeros(len(blocks), dtype=bool)
+        if len(blocks) == 0:
+            return keep
+        self._grow(blocks.max())
+
+        unique_blocks, first_index = np.unique(blocks, return_index=True)
+        byte_index = unique_blocks >> 3
+        bit_mask = (np.uint8(1) << (unique_blocks & 7).astype(np.uint8))
+        unseen = (self.bits[byte_index] & bit_mask) == 0
+
+        np.bitwise_or.at(self.bits, byte_index[unseen], bit_mask[unseen])
+        keep[first_index[unseen]] = True
+        return keep
+
+@instrumented('preprocess', mode='streaming')
+def preprocess_eth_blocks_csv_streaming(input_file, output_file, store_dir=None, chunksize=250_000):
+    """
+    Streaming version of preprocess_eth_blocks_csv with flat peak memory:
+    1. Read the CSV in chunks of `chunksize` rows
+    2. Clean numeric columns and drop invalid Block numbers per chunk
+    3. Drop blocks already seen in earlier chunks using a BlockBitmap
+    4. Extract Date and append the chunk to the output CSV (and block store)
+    """
+
+    print(f"Streaming CSV file: {input_file} (chunks of {chunksize:,} rows)")
+    stage = current_stage()
+
+    try:
+        stage.bytes = os.path.getsize(input_file)
+        header = pd.read_csv(input_file, nrows=0).columns.tolist()
+
+        if 'DateTime (UTC)' not in header:
+            print("❌ 'DateTime (UTC)' column not found!")
+            return False
+        if 'Block' not in header:
+            print("❌ 'Block' column not found!")
+            return False
+
+        # The store is rebuilt from scratch, one set of files per chunk
+        if store_dir and os.path.isdir(store_dir):
+            shutil.rmtree(store_dir)
+
+        numeric_columns = ['Block', 'Slot', 'Epoch', 'Txn', 'Gas Used', 'Gas Limit']
+        seen = BlockBitmap()
+        rows_read = 0
+        rows_written = 0
+        duplicates_removed = 0
+        invalid_blocks = 0
+        dates = set()
+
+        # Per-chunk wall time includes reading the chunk
+        chunk_start = time.perf_counter()
+        reader = pd.read_csv(input_file, dtype=str, chunksize=chunksize)
+        for chunk_number, chunk in enumerate(reader):
+            rows_read += len(chunk)
+
+            # Clean numeric columns (remove commas)
+            for col in numeric_columns:
+                if col in chunk.columns:
+                    chunk[col] = clean_numeric(chunk[col]).astype('Int64')
+
+            # Remove rows with invalid Block numbers
+            valid = chunk['Block'].notna().to_numpy()
+            invalid_blocks += int((~valid).sum())
+            chunk = chunk[valid]
+
+            # Remove duplicates across all chunks seen so far
+            first_seen = seen.add_new(chunk['Block'].to_numpy(dtype=np.int64))
+            duplicates_removed += int((~first_seen).sum())
+            chunk = chunk[first_seen]
+
+            chunk['Date'] = pd.to_datetime(chunk['DateTime (UTC)']).dt.strftime('%Y-%m-%d')
+            dates.update(chunk['Date'].dropna().unique())
+
+            cols = [col for col in chunk.columns if col not in ('Date', 'Block')]
+            chunk = chunk[['Date', 'Block'] + cols]
+
+            chunk.to_csv(output_file, mode='w' if chunk_number == 0 else 'a',
+                         header=chunk_number == 0, index=False)
+            if store_dir and len(chunk):
+                write_block_store(chunk, store_dir, chunk_id=chunk_number)
+
+            rows_written += len(chunk)
+            print(f"Chunk {chunk_number + 1}: {rows_read:,} rows read, {rows_written:,} written")
+            stage.observe('chunk_seconds', time.perf_counter() - chunk_start)
+            chunk_start = time.perf_counter()
+
+        stage.rows = rows_read
+        stage.count('rows_written', rows_written)
+        stage.count('duplicates_removed', duplicates_removed)
+        stage.count('invalid_blocks', invalid_blocks)
+
+        if rows_written == 0:
+            # No output file or block store was written for downstream stages to read
+            print(f"❌ No valid blocks in {input_file} ({rows_read} rows read)")
+            return False
+
+        print(f"✅ Removed {duplicates_removed} duplicate blocks")
+        if invalid_blocks > 0:
+            print(f"⚠️  Removed {invalid_blocks} rows with invalid block numbers")
+        if dates:
+            print(f"✅ Unique dates: {len(dates)} ({min(dates)} to {max(dates)})")
+        print(f"✅ Processed file saved: {output_file}")
+        if store_dir:
+            print(f"✅ Block store written: {store_dir}")
+        print(f"Final record count: {rows_written}")
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Error processing file: {str(e)}")
+        return False
+
+@instrumented('validate')
 def validate_processed_file(file_path):
-    """Validate the processed file for common issues"""
+    """Validate the processed file (CSV or block store directory) for common issues"""
+    stage = current_stage()
     try:
-        df = pd.read_csv(file_path)
+        if os.path.isdir(file_path):
+            # Only the key columns are needed from the columnar store
+            df = load_blocks(file_path, columns=['Date', 'Block'])
+        else:
+            df = pd.read_csv(file_path)
+        stage.rows = len(df)
+        stage.extra['source'] = 'block_store' if os.path.isdir(file_path) else 'csv'
         
         print(f"\n=== Validation Results ===")
         print(f"Total records: {len(df)}")
@@ -102,6 +266,9 @@ def validate_processed_file(file_path):
             print(f"⚠️  {missing_dates} rows missing Date")
         if missing_blocks > 0:
             print(f"⚠️  {missing_blocks} rows missing Block")
+        stage.count('missing_dates', int(missing_dates))
+        stage.count('missing_blocks', int(missing_blocks))
+        stage.count('duplicate_blocks', int(len(df) - df['Block'].nunique()))
             
         # Check date format
         try:
@@ -123,21 +290,31 @@ def validate_processed_file(file_path):
 if __name__ == "__main__":
     input_file = "ETH_Block_Data_Cleaned.csv"
     output_file = "ETH_Block_Data_Processed.csv"
+    store_dir = "ETH_Block_Store"
     
     print("=== ETH Blocks CSV Preprocessing ===")
     
+    # --events FILE / --profile DIR record stage timings and cProfile dumps
+    configure_from_argv()
+    
     # Check if input file exists
     if not os.path.exists(input_file):
         print(f"❌ Input file not found: {input_file}")
         exit(1)
     
-    # Preprocess the file
-    if preprocess_eth_blocks_csv(input_file, output_file):
+    # Preprocess the file (--stream keeps memory flat for the full history)
+    if "--stream" in sys.argv:
+        success = preprocess_eth_blocks_csv_streaming(input_file, output_file, store_dir=store_dir)
+    else:
+        success = preprocess_eth_blocks_csv(input_file, output_file, store_dir=store_dir)
+    
+    if success:
         print(f"\n=== Preprocessing completed successfully! ===")
         
-        # Validate the processed file
-        validate_processed_file(output_file)
+        # Validate from the columnar store instead of re-reading the CSV
+        validate_processed_file(store_dir)
         
         print(f"\n🎉 Ready for DynamoDB upload: {output_file}")
     else:
-        print(f"❌ Preprocessing failed")
\ No newline at end of file
+        print(f"❌ Preprocessing failed")
+        exit(1)
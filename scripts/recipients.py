@@ -0,0 +1,204 @@
+import os
+import numpy as np
+import pandas as pd
+
+ADDRESS_COL = 'Fee Recipient'
+NAMETAG_COL = 'Fee Recipient Nametag'
+DICTIONARY_FILE = '../data/processed/recipient_dictionary.parquet'
+ENTITY_FILE = '../data/processed/recipient_entities.csv'
+
+# Manual merges applied on top of the nametags: {nametag or address: entity}.
+# Operators that pay to several addresses under different nametags go here.
+ENTITY_GROUPS = {}
+
+def _factorize(values):
+    """(codes, uniques) of a column, reusing the categories of a categorical"""
+    if isinstance(values, pd.Series):
+        values = values.array
+    if isinstance(values, pd.Categorical):
+        return np.asarray(values.codes, dtype=np.int64), np.asarray(values.categories, dtype=object)
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return codes, np.asarray(uniques, dtype=object)
+
+def normalize_addresses(values):
+    """Lower-cased, stripped addresses with None for missing or empty values"""
+    normalized = pd.Series(values, dtype=object).str.strip().str.lower()
+    normalized = normalized.where(normalized.notna() & (normalized != ''), None)
+    return normalized.to_numpy(dtype=object)
+
+class RecipientDictionary:
+    """
+    Persisted address -> dense int32 code dictionary.
+
+    Codes are positions in `addresses` and never change once assigned: new
+    addresses are appended, so codes stored alongside earlier data stay
+    valid. Missing addresses encode to -1. Hashing happens once per distinct
+    value of a column (categorical columns from the block store are not
+    hashed row by row at all), so encoding millions of rows costs one
+    integer gather.
+    """
+
+    def __init__(self, addresses=()):
+        self.addresses = pd.Index(normalize_addresses(list(addresses)), dtype=object)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    @classmethod
+    def load(cls, path=DICTIONARY_FILE):
+        """Load the dictionary, or start an empty one if `path` does not exist"""
+        if not os.path.exists(path):
+            return cls()
+        return cls(pd.read_parquet(path)['address'])
+
+    def save(self, path=DICTIONARY_FILE):
+        """Write the dictionary (address in code order) atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        pd.DataFrame({'code': np.arange(len(self), dtype=np.int32), 'address': self.addresses}) \
+            .to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+
+    def encode(self, values, add=True):
+        """int32 codes for a column of addresses, appending unseen ones when `add`"""
+        row_codes, uniques = _factorize(values)
+        uniques = normalize_addresses(uniques)
+        lookup = self.addresses.get_indexer(uniques)
+
+        unseen = (lookup < 0) & pd.notna(uniques)
+        if add and unseen.any():
+            new = pd.unique(uniques[unseen])
+            self.addresses = self.addresses.append(pd.Index(new, dtype=object))
+            lookup = self.addresses.get_indexer(uniques)
+
+        lookup = np.r_[lookup, -1].astype(np.int32)
+        return lookup[row_codes]
+
+    def decode(self, codes):
+        """Addresses for codes (None for -1)"""
+        codes = np.asarray(codes)
+        addresses = np.r_[self.addresses.to_numpy(dtype=object), None]
+        return addresses[np.where(codes >= 0, codes, len(self))]
+
+def update_entity_table(table, dictionary, codes, nametags):
+    """
+    Add dictionary addresses missing from the address -> entity table.
+
+    A new address takes the nametag it carries most often in `nametags`
+    (aligned with the address `codes`) as its entity, or its own address when
+    it was never tagged, so untagged blocks are attributed to their address
+    instead of being dropped. Existing rows, including manual edits of the
+    entity column, are kept as they are.
+
+    Returns the table with columns [code, address, nametag, entity].
+    """
+    if table is None:
+        table = pd.DataFrame({'code': pd.Series(dtype=np.int32), 'address': pd.Series(dtype=object),
+                              'nametag': pd.Series(dtype=object), 'entity': pd.Series(dtype=object)})
+    new_codes = np.setdiff1d(np.arange(len(dictionary), dtype=np.int32), table['code'].to_numpy())
+    if len(new_codes) == 0:
+        return table
+
+    # Most frequent nametag per address code, counted on integer pairs
+    tag_codes, tags = _factorize(nametags)
+    codes = np.asarray(codes, dtype=np.int64)
+    tagged = (codes >= 0) & (tag_codes >= 0)
+    pairs = pd.DataFrame({'code': codes[tagged], 'tag': tag_codes[tagged]}).value_counts().reset_index()
+    pairs = pairs.drop_duplicates('code')
+    nametag = np.full(len(dictionary), None, dtype=object)
+    nametag[pairs['code'].to_numpy()] = tags[pairs['tag'].to_numpy()]
+
+    addresses = dictionary.decode(new_codes)
+    new_rows = pd.DataFrame({
+        'code': new_codes,
+        'address': addresses,
+        'nametag': nametag[new_codes],
+        'entity': np.where(pd.notna(nametag[new_codes]), nametag[new_codes], addresses),
+    })
+    return pd.concat([table, new_rows], ignore_index=True).sort_values('code').reset_index(drop=True)
+
+def merge_entities(table, groups=ENTITY_GROUPS):
+    """Point every address whose nametag or address is a key of `groups` to that entity"""
+    table = table.copy()
+    for key, entity in groups.items():
+        matches = (table['nametag'] == key) | (table['address'] == str(key).lower())
+        table.loc[matches, 'entity'] = entity
+    return table
+
+def load_entity_table(path=ENTITY_FILE):
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype={'code': np.int32, 'address': object, 'nametag': object, 'entity': object})
+
+def save_entity_table(table, path=ENTITY_FILE):
+    """Write the entity table as CSV (it is meant to be edited by hand) atomically"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    table.to_csv(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+
+def entity_index(table, dictionary):
+    """
+    (entity_of, entities): int32 entity code for every address code, so
+    entity codes are entity_of[address_codes], plus the entity names.
+    Addresses not in the table are their own entity.
+    """
+    entity = dictionary.addresses.to_numpy(dtype=object).copy()
+    entity[table['code'].to_numpy()] = table['entity'].to_numpy(dtype=object)
+    entity_of, entities = pd.factorize(entity)
+    return entity_of.astype(np.int32), pd.Index(entities, dtype=object)
+
+def recipient_codes(blocks, dictionary, table=None, level='address', address_col=ADDRESS_COL,
+                    nametag_col=NAMETAG_COL):
+    """
+    Encode the fee recipient of every block as int32 codes (-1 = none) at
+    'address' or 'entity' level, updating the dictionary (and the entity
+    table, if given) with unseen addresses.
+
+    Returns (codes, labels, table) with labels[code] the address or entity
+    name; pass the codes as the recipient column to
+    aggregation.count_blocks_by_period and metrics.count_matrix.
+    """
+    codes = dictionary.encode(blocks[address_col])
+    if table is not None or level == 'entity':
+        table = update_entity_table(table, dictionary, codes, blocks[nametag_col])
+    if level == 'address':
+        return codes, dictionary.addresses, table
+    if level != 'entity':
+        raise ValueError(f"Unknown level '{level}', expected 'address' or 'entity'")
+
+    entity_of, entities = entity_index(merge_entities(table), dictionary)
+    return np.where(codes >= 0, entity_of[np.maximum(codes, 0)], -1).astype(np.int32), entities, table
+
+if __name__ == "__main__":
+    import time
+    from block_store import load_blocks
+    from aggregation import build_rank_share_matrix, add_centrality_metrics
+
+    store_dir = "../data/raw/ETH_Block_Store"
+
+    print("=== Fee Recipient Dictionary ===")
+    if not os.path.isdir(store_dir):
+        print(f"❌ Block store not found: {store_dir}")
+        print("Please run the preprocessing script first!")
+        exit(1)
+
+    blocks = load_blocks(store_dir, columns=['Block', 'DateTime (UTC)', ADDRESS_COL, NAMETAG_COL])
+    dictionary = RecipientDictionary.load()
+    table = load_entity_table()
+    known = len(dictionary)
+
+    start_time = time.time()
+    codes, entities, table = recipient_codes(blocks, dictionary, table, level='entity')
+    print(f"✅ Encoded {len(blocks):,} blocks in {time.time() - start_time:.2f}s: "
+          f"{len(dictionary):,} addresses ({len(dictionary) - known:,} new), {len(entities):,} entities")
+
+    dictionary.save()
+    save_entity_table(table)
+    print(f"✅ Saved {DICTIONARY_FILE} and {ENTITY_FILE}")
+
+    untagged = table['nametag'].isna()
+    print(f"⚠️  {untagged.sum():,} addresses without a nametag are counted as their own entity")
+
+    # Daily concentration at entity level from the integer codes
+    blocks['entity'] = codes
+    daily = add_centrality_metrics(build_rank_share_matrix(blocks, 'day', recipient_col='entity'))
+    print(daily[['date', 'top1_centrality', 'top20_mean', 'hhi', 'gini']].tail())
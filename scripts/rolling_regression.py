@@ -0,0 +1,172 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Models of ETH_daily_analysis.ipynb (the notebook's 'market_volatillity_lag1' is not a column and drops out)
+EXPLANATORY_VARS = ['eth_intraday_vol_lag1', 'eth_turnover', 'market_turnover', 'gini']
+PREDICTIVE_VARS = ['eth_intraday_vol_lag1', 'eth_turnover_lag1', 'market_turnover_lag1', 'gini_lag1']
+DEFAULT_WINDOWS = (90, 180, 365, None)
+# Windows whose smallest / largest eigenvalue of X'X falls below this are rank deficient
+RCOND = 1e-10
+
+def _window_sums(cumulative, window):
+    """Sums over the last `window` rows (all rows so far for window=None) from a leading-zero cumsum"""
+    if window is None:
+        return cumulative[1:]
+    sums = np.full_like(cumulative[1:], np.nan)
+    if window <= len(sums):
+        sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+def rolling_ols(y, X, windows=DEFAULT_WINDOWS, cov_type='nonrobust', min_nobs=None):
+    """
+    OLS of y on X over every rolling window ending at each row, for several
+    window lengths at once (None = expanding window). X is used as given: add
+    a constant column for a model with an intercept.
+
+    Every row adds the rank-one terms x x' and x y to running sums, so each
+    window's normal equations are a difference of two cumulative sums and
+    all windows are solved in one batched call, in time linear in the
+    number of rows. Columns are scaled first, and centered too when X has a
+    constant column to absorb the shift, to keep the running sums well
+    conditioned. cov_type='robust' (HC0) also accumulates the fourth-moment
+    terms of the sandwich. Rows with NaN are skipped; a window needs
+    `min_nobs` valid rows (default: the full window, or k + 1 for expanding)
+    and a full-rank X'X (e.g. a dummy that is zero throughout a window is
+    collinear with the constant), otherwise its row is NaN.
+
+    Returns {window: (coef, se, nobs)} with coef / se of shape (n, k).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    X = np.asarray(X, dtype=np.float64)
+    n, k = X.shape
+    valid = np.isfinite(y) & np.isfinite(X).all(axis=1)
+
+    # Standardize: X = Xs T^-1 up to the constant, so b = sy T bs + my e_const.
+    # Without a constant nothing absorbs a shift, so columns are only scaled
+    constant = np.flatnonzero(np.all(X[valid] == X[valid][:1], axis=0) & np.any(X[valid] != 0, axis=0))
+    is_constant = np.isin(np.arange(k), constant)
+    if len(constant):
+        center = np.where(is_constant, 0.0, X[valid].mean(axis=0))
+        y_center = y[valid].mean()
+    else:
+        center = np.zeros(k)
+        y_center = 0.0
+    scale = np.where(is_constant, 1.0, np.sqrt(((X[valid] - center) ** 2).mean(axis=0)))
+    scale[scale == 0] = 1.0
+    Xs = np.where(valid[:, None], (X - center) / scale, 0.0)
+    y_scale = np.sqrt(((y[valid] - y_center) ** 2).mean()) or 1.0
+    ys = np.where(valid, (y - y_center) / y_scale, 0.0)
+    if len(constant):
+        Xs[:, constant[0]] = valid
+
+    T = np.diag(1 / scale)
+    if len(constant):
+        T[constant[0]] -= center / scale
+
+    cum_xx = np.concatenate([np.zeros((1, k, k)), np.cumsum(np.einsum('ni,nj->nij', Xs, Xs), axis=0)])
+    cum_xy = np.vstack([np.zeros(k), np.cumsum(Xs * ys[:, None], axis=0)])
+    cum_yy = np.r_[0.0, np.cumsum(ys ** 2)]
+    cum_n = np.r_[0, np.cumsum(valid)]
+    if cov_type == 'robust':
+        # Meat sum x x' (y - x'b)^2 = sum xx'y^2 - 2 sum_l b_l xx'x_l y + sum_lm b_l b_m xx'x_l x_m
+        cum_xxyy = np.concatenate([np.zeros((1, k, k)),
+                                   np.cumsum(np.einsum('ni,nj,n->nij', Xs, Xs, ys ** 2), axis=0)])
+        cum_xxxy = np.concatenate([np.zeros((1, k, k, k)),
+                                   np.cumsum(np.einsum('ni,nj,nl,n->nijl', Xs, Xs, Xs, ys), axis=0)])
+        cum_xxxx = np.concatenate([np.zeros((1, k, k, k, k)),
+                                   np.cumsum(np.einsum('ni,nj,nl,nm->nijlm', Xs, Xs, Xs, Xs), axis=0)])
+
+    results = {}
+    for window in windows:
+        nobs = _window_sums(cum_n.astype(np.float64), window)
+        required = min_nobs or (window if window is not None else k + 1)
+        ok = np.isfinite(nobs) & (nobs >= max(required, k + 1))
+
+        coef = np.full((n, k), np.nan)
+        se = np.full((n, k), np.nan)
+        if ok.any():
+            eigenvalues = np.linalg.eigvalsh(_window_sums(cum_xx, window)[ok])
+            ok[ok] = eigenvalues[:, 0] > RCOND * eigenvalues[:, -1]
+        if ok.any():
+            XtX = _window_sums(cum_xx, window)[ok]
+            Xty = _window_sums(cum_xy, window)[ok]
+            XtX_inv = np.linalg.inv(XtX)
+            b = np.einsum('wij,wj->wi', XtX_inv, Xty)
+
+            if cov_type == 'robust':
+                meat = (_window_sums(cum_xxyy, window)[ok]
+                        - 2 * np.einsum('wijl,wl->wij', _window_sums(cum_xxxy, window)[ok], b)
+                        + np.einsum('wijlm,wl,wm->wij', _window_sums(cum_xxxx, window)[ok], b, b))
+                cov = XtX_inv @ meat @ XtX_inv
+            else:
+                rss = _window_sums(cum_yy, window)[ok] - (b * Xty).sum(axis=1)
+                cov = XtX_inv * (np.maximum(rss, 0) / (nobs[ok] - k))[:, None, None]
+
+            coef[ok] = y_scale * b @ T.T
+            if len(constant):
+                coef[ok, constant[0]] += y_center
+            cov = y_scale ** 2 * T @ cov @ T.T
+            se[ok] = np.sqrt(np.einsum('wii->wi', cov))
+        results[window] = (coef, se, np.where(ok, nobs, np.nan))
+    return results
+
+def rolling_regression(df, outcome, regressors, windows=DEFAULT_WINDOWS, cov_type='nonrobust', min_nobs=None,
+                       date_column='date'):
+    """
+    Coefficient and standard-error paths of outcome ~ const + regressors for
+    every window in `windows` (see rolling_ols), e.g. on the regression_data
+    columns of ETH_daily_analysis.ipynb.
+
+    Returns a tidy DataFrame with one row per (date, window, term): coef, se,
+    t and nobs. Expanding windows are labelled 'expanding'.
+    """
+    df = df.sort_values(date_column).reset_index(drop=True)
+    X = np.column_stack([np.ones(len(df)), df[regressors].to_numpy(dtype=np.float64)])
+    terms = ['const'] + list(regressors)
+    paths = rolling_ols(df[outcome].to_numpy(dtype=np.float64), X, windows, cov_type, min_nobs)
+
+    frames = []
+    for window, (coef, se, nobs) in paths.items():
+        keep = np.isfinite(nobs)
+        frame = pd.DataFrame({
+            date_column: np.repeat(df[date_column].to_numpy()[keep], len(terms)),
+            'window': 'expanding' if window is None else window,
+            'term': np.tile(terms, keep.sum()),
+            'coef': coef[keep].ravel(),
+            'se': se[keep].ravel(),
+            'nobs': np.repeat(nobs[keep], len(terms)).astype(np.int64),
+        })
+        frame['t'] = frame['coef'] / frame['se']
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+if __name__ == "__main__":
+    import time
+
+    print("=== Rolling / Expanding Regression Coefficients ===")
+    regression_data = pd.read_csv('../data/processed/daily_regression_data.csv')
+    regression_data['date'] = pd.to_datetime(regression_data['date'])
+
+    frames = []
+    start_time = time.time()
+    for model, regressors in (('explanatory', EXPLANATORY_VARS), ('predictive', PREDICTIVE_VARS)):
+        available = [var for var in regressors if var in regression_data.columns]
+        paths = rolling_regression(regression_data, 'eth_intraday_vol', available, cov_type='robust')
+        paths.insert(0, 'model', model)
+        frames.append(paths)
+    results = pd.concat(frames, ignore_index=True)
+    print(f"✅ {results[['model', 'window', 'date']].drop_duplicates().shape[0]:,} window fits "
+          f"in {time.time() - start_time:.2f}s")
+
+    os.makedirs('../results', exist_ok=True)
+    results.to_csv('../results/rolling_coefficients.csv', index=False)
+    print("Results saved as '../results/rolling_coefficients.csv'")
+
+    # Centrality coefficient around the Merge and Shanghai
+    gini = results[(results['model'] == 'explanatory') & (results['term'] == 'gini') & (results['window'] == 180)]
+    for event, date in (('Merge', '2022-09-15'), ('Shanghai', '2023-04-12')):
+        nearby = gini[(gini['date'] - pd.Timestamp(date)).abs() <= pd.Timedelta(days=60)]
+        if len(nearby):
+            print(f"\n180-day gini coefficient around {event} ({date}):")
+            print(nearby.iloc[::15][['date', 'coef', 'se', 't']].to_string(index=False))
@@ -1,50 +1,20 @@
-import pandas as pd
-import numpy as np
-import yfinance as yf
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from datetime import datetime
+from sharpe_sweep import load_sharpe_data, rolling_sharpe
+from plotting import render_figures, sharpe_regime_figure
 
-# Load existing data
+# Load existing data with the Treasury Bill risk-free rate (2SLS approach) merged in,
+# served from the local market data cache
 print("Loading data from daily_regression_data.csv...")
-df = pd.read_csv('../data/processed/daily_regression_data.csv')
-df['date'] = pd.to_datetime(df['date'])
-df = df.set_index('date')
+df = load_sharpe_data('../data/processed/daily_regression_data.csv')
 
-# Download risk-free rate (Treasury Bill) to match 2SLS approach
-print("Downloading Treasury Bill rate data...")
-start_date = df.index.min()
-end_date = df.index.max()
-treasury_data = yf.download('^IRX', start=start_date, end=end_date, progress=False)
-treasury_data = treasury_data[['Close']].copy()
-treasury_data.columns = ['interest_rate']
-treasury_data.index.name = 'date'
-treasury_data = treasury_data.reset_index()
-treasury_data['daily_rf'] = (treasury_data['interest_rate'] / 100) / 252
-
-# Merge with main dataset
-df = df.reset_index()
-df = df.merge(treasury_data[['date', 'daily_rf']], on='date', how='left')
-df['daily_rf'] = df['daily_rf'].ffill()
-df = df.set_index('date')
-
-# Rename columns to match (eth_return and market_return already in data)
-df = df.rename(columns={'eth_return': 'eth_returns', 'market_return': 'sp500_returns'})
-df = df.dropna(subset=['eth_returns', 'sp500_returns', 'daily_rf'])
-
-# Calculate rolling Sharpe ratios (30-day window)
+# Calculate rolling Sharpe ratios and volatility (30-day window, annualized);
+# sharpe_sweep.py evaluates other windows and centrality splits in one run
 window = 30
-df['eth_excess'] = df['eth_returns'] - df['daily_rf']
-df['sp500_excess'] = df['sp500_returns'] - df['daily_rf']
-
-df['eth_sharpe'] = (df['eth_excess'].rolling(window).mean() * 252) / \
-                   (df['eth_returns'].rolling(window).std() * np.sqrt(252))
-df['sp500_sharpe'] = (df['sp500_excess'].rolling(window).mean() * 252) / \
-                     (df['sp500_returns'].rolling(window).std() * np.sqrt(252))
-
-# Calculate rolling volatility (annualized)
-df['eth_vol'] = df['eth_returns'].rolling(window).std() * np.sqrt(252)
-df['sp500_vol'] = df['sp500_returns'].rolling(window).std() * np.sqrt(252)
+eth_sharpe, eth_vol = rolling_sharpe(df['eth_returns'], df['daily_rf'], [window])
+sp500_sharpe, sp500_vol = rolling_sharpe(df['sp500_returns'], df['daily_rf'], [window])
+df['eth_sharpe'] = eth_sharpe[0]
+df['sp500_sharpe'] = sp500_sharpe[0]
+df['eth_vol'] = eth_vol[0]
+df['sp500_vol'] = sp500_vol[0]
 
 # Identify high and low centrality periods using top20_mean
 centrality_high_threshold = df['top20_mean'].quantile(0.75)
@@ -56,65 +26,9 @@ df['low_centrality'] = df['top20_mean'] < centrality_low_threshold
 # Calculate Sharpe ratio difference
 df['sharpe_diff'] = df['eth_sharpe'] - df['sp500_sharpe']
 
-# Create visualization
-fig, axes = plt.subplots(3, 1, figsize=(14, 13), sharex=True)
-
-# Sharpe Ratio Plot
-ax1 = axes[0]
-ax1.plot(df.index, df['eth_sharpe'], label='ETH Sharpe', color='#627EEA', linewidth=1.5)
-ax1.plot(df.index, df['sp500_sharpe'], label='S&P 500 Sharpe', color='#1f77b4', linewidth=1.5)
-ax1.axhline(y=0, color='gray', linestyle='--', alpha=0.5)
-ax1.fill_between(df.index, ax1.get_ylim()[0], ax1.get_ylim()[1], where=df['high_centrality'], 
-                  alpha=0.2, color='red', label='High Centrality (top 25%)')
-ax1.fill_between(df.index, ax1.get_ylim()[0], ax1.get_ylim()[1], where=df['low_centrality'],
-                  alpha=0.2, color='green', label='Low Centrality (bottom 25%)')
-ax1.set_ylabel('Sharpe Ratio (30-day rolling)', fontsize=11)
-ax1.set_title('ETH vs S&P 500: Sharpe Ratio Comparison by Centrality Periods', 
-              fontsize=13, fontweight='bold')
-ax1.legend(loc='upper left', fontsize=9)
-ax1.grid(True, alpha=0.3)
-
-# Sharpe Difference Plot (ETH - S&P 500)
-ax2 = axes[1]
-ax2.plot(df.index, df['sharpe_diff'], label='ETH - S&P 500 Sharpe Diff', color='black', linewidth=1.5, alpha=0.7)
-ax2.axhline(y=0, color='gray', linestyle='-', linewidth=2, alpha=0.5)
-ax2.fill_between(df.index, df['sharpe_diff'], 0, where=(df['sharpe_diff'] > 0), 
-                  alpha=0.3, color='#627EEA', label='ETH Outperforms', interpolate=True)
-ax2.fill_between(df.index, df['sharpe_diff'], 0, where=(df['sharpe_diff'] <= 0),
-                  alpha=0.3, color='red', label='S&P 500 Outperforms', interpolate=True)
-ax2.fill_between(df.index, ax2.get_ylim()[0], ax2.get_ylim()[1], where=df['high_centrality'], 
-                  alpha=0.1, color='orange')
-ax2.fill_between(df.index, ax2.get_ylim()[0], ax2.get_ylim()[1], where=df['low_centrality'],
-                  alpha=0.1, color='lightgreen')
-ax2.set_ylabel('Sharpe Difference', fontsize=11)
-ax2.set_title('ETH vs S&P 500: Sharpe Ratio Difference (Positive = ETH Better)', fontsize=12, fontweight='bold')
-ax2.legend(loc='upper left', fontsize=9)
-ax2.grid(True, alpha=0.3)
-
-# Centrality Plot
-ax3 = axes[2]
-ax3.plot(df.index, df['top20_mean'], label='Top 20 Mean Centrality', color='purple', linewidth=1.5)
-ax3.axhline(y=centrality_high_threshold, color='red', linestyle='--', alpha=0.7, 
-            label=f'High threshold (75th pct): {centrality_high_threshold:.2f}')
-ax3.axhline(y=centrality_low_threshold, color='green', linestyle='--', alpha=0.7,
-            label=f'Low threshold (25th pct): {centrality_low_threshold:.2f}')
-ax3.fill_between(df.index, ax3.get_ylim()[0], ax3.get_ylim()[1], where=df['high_centrality'], 
-                  alpha=0.15, color='red')
-ax3.fill_between(df.index, ax3.get_ylim()[0], ax3.get_ylim()[1], where=df['low_centrality'],
-                  alpha=0.15, color='green')
-ax3.set_ylabel('Centrality (top20_mean)', fontsize=11)
-ax3.set_xlabel('Date', fontsize=11)
-ax3.set_title('Validator Centrality Over Time', fontsize=12, fontweight='bold')
-ax3.legend(loc='upper left', fontsize=9)
-ax3.grid(True, alpha=0.3)
-
-# Format x-axis
-ax3.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-ax3.xaxis.set_major_locator(mdates.MonthLocator(interval=6))
-plt.xticks(rotation=45)
-
-plt.tight_layout()
-plt.savefig('../results/sharpe_comparison.png', dpi=300, bbox_inches='tight')
+# Create visualization (regimes shaded as spans, long lines downsampled, Agg backend)
+render_figures([(sharpe_regime_figure, {'df': df, 'metric': 'top20_mean', 'window': window},
+                 '../results/sharpe_comparison.png')])
 print("\nPlot saved as '../results/sharpe_comparison.png'")
 
 # Summary statistics
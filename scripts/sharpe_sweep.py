@@ -0,0 +1,184 @@
+import os
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from market_data import treasury_rate
+from volatility import rolling_moments
+
+DEFAULT_WINDOWS = (7, 14, 30, 60, 90, 120, 180)
+DEFAULT_METRICS = ('top20_mean', 'top10_mean', 'top1_centrality', 'top5_centrality', 'hhi', 'gini')
+DEFAULT_QUANTILE_PAIRS = tuple(
+    (low, high) for low, high in itertools.product((0.1, 0.2, 0.25, 0.3, 0.4), (0.6, 0.7, 0.75, 0.8, 0.9))
+)
+
+def load_sharpe_data(data_file='../data/processed/daily_regression_data.csv'):
+    """
+    Load the daily regression data with the Treasury Bill daily risk-free
+    rate merged in (forward-filled), returns renamed to eth_returns /
+    sp500_returns and indexed by date.
+    """
+    df = pd.read_csv(data_file)
+    df['date'] = pd.to_datetime(df['date'])
+
+    treasury_data = treasury_rate(df['date'].min(), df['date'].max())
+    treasury_data['daily_rf'] = (treasury_data['interest_rate'] / 100) / 252
+
+    df = df.merge(treasury_data[['date', 'daily_rf']], on='date', how='left')
+    df['daily_rf'] = df['daily_rf'].ffill()
+    df = df.set_index('date')
+
+    df = df.rename(columns={'eth_return': 'eth_returns', 'market_return': 'sp500_returns'})
+    return df.dropna(subset=['eth_returns', 'sp500_returns', 'daily_rf'])
+
+def rolling_sharpe(returns, rf, windows, periods_per_year=252):
+    """
+    Annualized rolling Sharpe ratio and volatility for several windows at once.
+
+    Same definition as sharpe_comparison.py: mean excess return over the
+    window times `periods_per_year`, divided by the window's sample std of
+    raw returns times sqrt(`periods_per_year`). Returns (sharpe, vol) arrays
+    of shape (len(windows), len(returns)).
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    excess_mean, _ = rolling_moments(returns - np.asarray(rf, dtype=np.float64), windows)
+    _, return_var = rolling_moments(returns, windows)
+
+    vol = np.sqrt(return_var) * np.sqrt(periods_per_year)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = excess_mean * periods_per_year / vol
+    return sharpe, vol
+
+def _regime_stats(masks, series):
+    """
+    Mean of every (windows x days) series over the days selected by each
+    (quantile pairs x days) mask, skipping NaN. Returns {name: (pairs x windows)}.
+    """
+    masks = masks.astype(np.float64)
+    stats = {}
+    for name, values in series.items():
+        valid = np.isfinite(values)
+        totals = masks @ np.where(valid, values, 0.0).T
+        counts = masks @ valid.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats[name] = totals / counts
+    diff = series['sharpe_diff']
+    outperform = masks @ (diff > 0).T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats['eth_outperform_pct'] = outperform / (masks @ np.isfinite(diff).T) * 100
+    return stats
+
+def sharpe_sweep(df, windows=DEFAULT_WINDOWS, metrics=DEFAULT_METRICS, quantile_pairs=DEFAULT_QUANTILE_PAIRS,
+                 periods_per_year=252, max_workers=None):
+    """
+    Evaluate regime-conditional Sharpe statistics for every combination of
+    rolling window, centrality metric and (low, high) quantile pair.
+
+    Rolling moments for all windows come from one set of cumulative sums per
+    return series. For each metric, the high regime is metric > quantile(high)
+    and the low regime metric < quantile(low) (the top20_mean 75th/25th split
+    in sharpe_comparison.py is the pair (0.25, 0.75)). Regime means for all
+    windows and quantile pairs are computed as mask-matrix products, with
+    metrics evaluated in parallel threads.
+
+    Returns a tidy DataFrame with one row per (window, metric, q_low, q_high,
+    regime): threshold, days, mean ETH / S&P 500 Sharpe, mean Sharpe
+    difference, mean volatilities and the % of days ETH's Sharpe was higher.
+    """
+    windows = list(windows)
+    eth_sharpe, eth_vol = rolling_sharpe(df['eth_returns'], df['daily_rf'], windows, periods_per_year)
+    sp500_sharpe, sp500_vol = rolling_sharpe(df['sp500_returns'], df['daily_rf'], windows, periods_per_year)
+    series = {
+        'eth_sharpe': eth_sharpe,
+        'sp500_sharpe': sp500_sharpe,
+        'sharpe_diff': eth_sharpe - sp500_sharpe,
+        'eth_vol': eth_vol,
+        'sp500_vol': sp500_vol,
+    }
+
+    missing = [metric for metric in metrics if metric not in df.columns]
+    if missing:
+        print(f"⚠️  Skipping metrics not in the data: {missing}")
+    metrics = [metric for metric in metrics if metric in df.columns]
+
+    q_low = np.array([low for low, _ in quantile_pairs])
+    q_high = np.array([high for _, high in quantile_pairs])
+
+    def evaluate(metric):
+        values = df[metric].to_numpy(dtype=np.float64)
+        frames = []
+        for regime, quantiles, sign in (('high', q_high, 1), ('low', q_low, -1)):
+            thresholds = np.nanquantile(values, quantiles)
+            # sign flips the comparison: values > high threshold, values < low threshold
+            masks = sign * values > sign * thresholds[:, None]
+            stats = _regime_stats(masks, series)
+
+            # (pairs x windows) grids flattened with windows varying fastest
+            frame = pd.DataFrame({
+                'window': np.tile(windows, len(quantile_pairs)),
+                'metric': metric,
+                'q_low': np.repeat(q_low, len(windows)),
+                'q_high': np.repeat(q_high, len(windows)),
+                'regime': regime,
+                'threshold': np.repeat(thresholds, len(windows)),
+                'days': np.repeat(masks.sum(axis=1), len(windows)),
+            })
+            for name, grid in stats.items():
+                frame[name] = grid.ravel()
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(evaluate, metrics))
+
+    if not results:
+        return pd.DataFrame()
+    results = pd.concat(results, ignore_index=True)
+    return results.sort_values(['metric', 'window', 'q_low', 'q_high', 'regime']).reset_index(drop=True)
+
+def regime_spread(results, value='sharpe_diff'):
+    """High-minus-low spread of `value` per (window, metric, q_low, q_high)"""
+    wide = results.pivot_table(index=['window', 'metric', 'q_low', 'q_high'], columns='regime', values=value)
+    wide[f'{value}_spread'] = wide['high'] - wide['low']
+    return wide.reset_index()
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    print("=== Rolling Sharpe / Centrality Regime Sweep ===")
+    df = load_sharpe_data()
+
+    start_time = time.time()
+    results = sharpe_sweep(df)
+    duration = time.time() - start_time
+
+    configs = results[['window', 'metric', 'q_low', 'q_high']].drop_duplicates()
+    print(f"✅ Evaluated {len(configs):,} configurations in {duration:.2f}s")
+
+    os.makedirs('../results', exist_ok=True)
+    results.to_csv('../results/sharpe_sweep.csv', index=False)
+    print("Results saved as '../results/sharpe_sweep.csv'")
+
+    spread = regime_spread(results)
+    print("\nLargest high-minus-low Sharpe difference spreads:")
+    print(spread.reindex(spread['sharpe_diff_spread'].abs().sort_values(ascending=False).index).head(10))
+
+    # --plots renders the 30-day quartile-split figure for every metric in a process pool
+    if "--plots" in sys.argv:
+        from plotting import render_figures, sharpe_regime_figure
+
+        eth_sharpe, _ = rolling_sharpe(df['eth_returns'], df['daily_rf'], [30])
+        sp500_sharpe, _ = rolling_sharpe(df['sp500_returns'], df['daily_rf'], [30])
+        df['eth_sharpe'] = eth_sharpe[0]
+        df['sp500_sharpe'] = sp500_sharpe[0]
+
+        metrics = results['metric'].unique()
+        columns = ['eth_sharpe', 'sp500_sharpe'] + list(metrics)
+        jobs = [(sharpe_regime_figure, {'df': df[columns], 'metric': metric},
+                 f'../results/sharpe_regimes/{metric}.png') for metric in metrics]
+
+        start_time = time.time()
+        render_figures(jobs)
+        print(f"✅ Rendered {len(jobs)} figures to ../results/sharpe_regimes/ in {time.time() - start_time:.1f}s")
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+ESTIMATORS = ('parkinson', 'garman_klass', 'rogers_satchell', 'yang_zhang', 'close_to_close')
+
+def log_terms(open_, high, low, close):
+    """
+    Log-price intermediates shared by all estimators, computed once:
+    hl = ln(H/L), co = ln(C/O), ho / lo = ln(H/O) / ln(L/O), hc / lc = ln(H/C) / ln(L/C),
+    overnight = ln(O_t / C_t-1), ret = simple close-to-close return (NaN on the first bar)
+    """
+    close_price = np.asarray(close, dtype=np.float64)
+    o, h, l, c = (np.log(np.asarray(x, dtype=np.float64)) for x in (open_, high, low, close_price))
+    prev_close = np.r_[np.nan, c[:-1]]
+    return {
+        'hl': h - l,
+        'co': c - o,
+        'ho': h - o,
+        'lo': l - o,
+        'hc': h - c,
+        'lc': l - c,
+        'overnight': o - prev_close,
+        'ret': close_price / np.r_[np.nan, close_price[:-1]] - 1,
+    }
+
+def rolling_moments(x, windows):
+    """
+    Rolling means and sample variances (ddof=1) of `x` for several window
+    lengths, from one set of cumulative sums. Returns two arrays of shape
+    (len(windows), len(x)); windows that are not yet full or contain NaN give
+    NaN. The series mean is subtracted first to keep the running sums well
+    conditioned.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    valid = np.isfinite(x)
+    center = x[valid].mean() if valid.any() else 0.0
+    centered = np.where(valid, x - center, 0.0)
+
+    cum_valid = np.r_[0.0, np.cumsum(valid)]
+    cum = np.r_[0.0, np.cumsum(centered)]
+    cum_squares = np.r_[0.0, np.cumsum(centered ** 2)]
+
+    means = np.full((len(windows), len(x)), np.nan)
+    variances = np.full((len(windows), len(x)), np.nan)
+    for i, window in enumerate(windows):
+        if window > len(x):
+            continue
+        complete = cum_valid[window:] - cum_valid[:-window] == window
+        total = cum[window:] - cum[:-window]
+        squares = cum_squares[window:] - cum_squares[:-window]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[i, window - 1:] = np.where(complete, total / window + center, np.nan)
+            variances[i, window - 1:] = np.where(
+                complete, np.maximum(squares - total ** 2 / window, 0) / (window - 1), np.nan
+            )
+    return means, variances
+
+def ohlc_volatility(open_, high, low, close, windows=(), estimators=ESTIMATORS, periods_per_year=None,
+                    yang_zhang_k=None, index=None, prefix=''):
+    """
+    Parkinson, Garman-Klass, Rogers-Satchell, Yang-Zhang and close-to-close
+    volatility from OHLC prices in one vectorized pass.
+
+    Per-bar columns are named `{prefix}{estimator}_vol` and match the
+    formulas in ETH_daily_analysis.ipynb (Yang-Zhang with the whole-sample k,
+    unless `yang_zhang_k` is given). Close-to-close has no per-bar value.
+
+    For each window w in `windows`, rolling columns `{prefix}{estimator}_vol_{w}d`
+    average the per-bar variances over the last w bars. Rolling Yang-Zhang
+    combines the overnight and open-to-close sample variances with the
+    Rogers-Satchell mean using k = 0.34 / (1.34 + (w+1)/(w-1)); close-to-close
+    is the sample std of simple returns (as in ETH_analysis.ipynb).
+
+    `periods_per_year` (e.g. 365) annualizes every column.
+    """
+    if index is None and isinstance(close, pd.Series):
+        index = close.index
+    terms = log_terms(open_, high, low, close)
+    n = len(terms['hl'])
+    scale = np.sqrt(periods_per_year) if periods_per_year else 1.0
+
+    # Per-bar variances shared by the per-bar and rolling estimates
+    parkinson_var = terms['hl'] ** 2 / (4 * np.log(2))
+    garman_klass_var = 0.5 * terms['hl'] ** 2 - (2 * np.log(2) - 1) * terms['co'] ** 2
+    rogers_satchell_var = terms['hc'] * terms['ho'] + terms['lc'] * terms['lo']
+
+    columns = {}
+    with np.errstate(invalid='ignore'):
+        if 'parkinson' in estimators:
+            columns[f'{prefix}parkinson_vol'] = np.sqrt(parkinson_var) * scale
+        if 'garman_klass' in estimators:
+            columns[f'{prefix}garman_klass_vol'] = np.sqrt(garman_klass_var) * scale
+        if 'rogers_satchell' in estimators:
+            columns[f'{prefix}rogers_satchell_vol'] = np.sqrt(rogers_satchell_var) * scale
+        if 'yang_zhang' in estimators:
+            k = yang_zhang_k if yang_zhang_k is not None else 0.34 / (1.34 + (n + 1) / (n - 1))
+            columns[f'{prefix}yang_zhang_vol'] = np.sqrt(
+                terms['overnight'] ** 2 + k * terms['co'] ** 2 + (1 - k) * rogers_satchell_var
+            ) * scale
+
+        # Rolling moments for every window from one set of cumulative sums per series
+        windows = list(windows)
+        if windows:
+            parkinson_mean, _ = rolling_moments(parkinson_var, windows)
+            garman_klass_mean, _ = rolling_moments(garman_klass_var, windows)
+            rs_mean, _ = rolling_moments(rogers_satchell_var, windows)
+            _, overnight_var = rolling_moments(terms['overnight'], windows)
+            _, open_close_var = rolling_moments(terms['co'], windows)
+            _, return_var = rolling_moments(terms['ret'], windows)
+
+        for i, window in enumerate(windows):
+            suffix = f'_vol_{window}d'
+            if 'parkinson' in estimators:
+                columns[f'{prefix}parkinson{suffix}'] = np.sqrt(parkinson_mean[i]) * scale
+            if 'garman_klass' in estimators:
+                columns[f'{prefix}garman_klass{suffix}'] = np.sqrt(garman_klass_mean[i]) * scale
+            if 'rogers_satchell' in estimators:
+                columns[f'{prefix}rogers_satchell{suffix}'] = np.sqrt(rs_mean[i]) * scale
+            if 'yang_zhang' in estimators:
+                k = 0.34 / (1.34 + (window + 1) / (window - 1))
+                columns[f'{prefix}yang_zhang{suffix}'] = np.sqrt(
+                    overnight_var[i] + k * open_close_var[i] + (1 - k) * rs_mean[i]
+                ) * scale
+            if 'close_to_close' in estimators:
+                columns[f'{prefix}close_to_close{suffix}'] = np.sqrt(return_var[i]) * scale
+
+    return pd.DataFrame(columns, index=index)
+
+def add_volatility(df, prefix='', **kwargs):
+    """
+    Add volatility columns to a frame with Open/High/Low/Close columns
+    (either capitalized as from yfinance or lowercase as in ethereum.xlsx).
+    Keyword arguments are passed to ohlc_volatility.
+    """
+    names = ['Open', 'High', 'Low', 'Close']
+    if not all(name in df.columns for name in names):
+        names = [name.lower() for name in names]
+
+    result = ohlc_volatility(*(df[name] for name in names), index=df.index, prefix=prefix, **kwargs)
+    for column in result.columns:
+        df[column] = result[column]
+    return df